@@ -0,0 +1,162 @@
+# %%
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+
+from augurdb_records import Records
+
+if TYPE_CHECKING:
+    from augurdb_database import AugurDatabase
+
+
+# %%
+@dataclass(frozen=True)
+class ChangeSet:
+    """The fields changed by a commit, as a mapping from object ids to new values."""
+
+    lsn: int
+    changes: Records
+
+    def copy(self) -> "ChangeSet":
+        """Return a change set with copies of the changed records."""
+        return ChangeSet(
+            self.lsn, {obj_id: dict(values) for obj_id, values in self.changes.items()}
+        )
+
+
+class SubscriptionClosed(RuntimeError):
+    pass
+
+
+class Subscription:
+    """A bounded queue of the change sets of a database for a single consumer.
+
+    A commit waits while the queue is full, for at most `timeout` seconds (forever
+    if `timeout` is `None`). If the queue is still full, the subscription is closed,
+    and the consumer gets a `SubscriptionClosed` error after the queued change
+    sets; it has to read the records to catch up.
+
+    Change sets can be received with `get()` or by iterating, and in asyncio
+    code with `await get_async()` or `async for`.
+    """
+
+    def __init__(self, database: "AugurDatabase", maxsize: int, timeout: float | None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive.")
+        self.database = database
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._queue: deque[ChangeSet] = deque()
+        self._condition = threading.Condition()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._error: SubscriptionClosed | None = None
+        self.is_closed = False
+
+    def put(self, change_set: ChangeSet):
+        """Queue `change_set` for the consumer.
+
+        Never raises: the commit of `change_set` is already applied. If the
+        change set cannot be queued, the subscription is closed instead."""
+        with self._condition:
+            try:
+                if not self._condition.wait_for(
+                    lambda: self.is_closed or len(self._queue) < self.maxsize,
+                    self.timeout,
+                ):
+                    self._close(SubscriptionClosed("The consumer fell behind."))
+                if self.is_closed:
+                    return
+                self._queue.append(change_set)
+                self._condition.notify_all()
+                self._wake_async_waiters()
+            except Exception as error:
+                self._close(SubscriptionClosed(f"Publishing failed: {error!r}"))
+
+    def get(self, timeout: float | None = None) -> ChangeSet:
+        """Return the next change set.
+
+        Raise a `TimeoutError` if there is none within `timeout` seconds and a
+        `SubscriptionClosed` error if the subscription is closed."""
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._queue or self.is_closed, timeout
+            ):
+                raise TimeoutError("No change set was published.")
+            return self._pop()
+
+    async def get_async(self) -> ChangeSet:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._queue or self.is_closed:
+                    return self._pop()
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await future
+            finally:
+                # A cancelled waiter must not be woken up after its loop is gone.
+                with self._condition:
+                    if (loop, future) in self._waiters:
+                        self._waiters.remove((loop, future))
+
+    def _pop(self) -> ChangeSet:
+        if self._queue:
+            change_set = self._queue.popleft()
+            self._condition.notify_all()
+            return change_set
+        raise self._error or SubscriptionClosed("The subscription is closed.")
+
+    def __iter__(self) -> Iterator[ChangeSet]:
+        while True:
+            try:
+                yield self.get()
+            except SubscriptionClosed:
+                if self._error is not None:
+                    raise
+                return
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ChangeSet:
+        try:
+            return await self.get_async()
+        except SubscriptionClosed:
+            if self._error is not None:
+                raise
+            raise StopAsyncIteration from None
+
+    def close(self):
+        with self._condition:
+            self._close(None)
+
+    def _close(self, error: SubscriptionClosed | None):
+        if not self.is_closed:
+            self.is_closed = True
+            self._error = error
+            self.database._unsubscribe(self)
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+    def _wake_async_waiters(self):
+        for loop, future in self._waiters:
+            try:
+                loop.call_soon_threadsafe(_set_result_if_pending, future)
+            except RuntimeError:
+                # The event loop has been closed; nobody waits for the future.
+                pass
+        self._waiters.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _set_result_if_pending(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,899 @@
+# %%
+import threading
+from collections import Counter, deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+from augurdb import TransactionError
+from augurdb_changes import ChangeSet, Subscription
+from augurdb_indexes import HashIndex, SortedIndex
+from augurdb_log import WriteAheadLog, read_snapshot, write_snapshot
+from augurdb_records import (
+    ColumnBatch,
+    CompactRecords,
+    FieldValues,
+    RecordStore,
+    Records,
+    merge_field_values,
+)
+from augurdb_savepoints import Savepoints
+
+# %%
+# For each object: the LSN of a commit, the record it replaced and the changed fields.
+History = dict[str, list[tuple[int, dict[str, Any] | None, frozenset[str]]]]
+
+
+# %%
+class ConflictError(TransactionError):
+    pass
+
+
+# %%
+@dataclass
+class AugurDatabase:
+    records: RecordStore = field(default_factory=dict)
+    current_transaction: Records | None = None
+    log: WriteAheadLog | None = field(default=None, repr=False)
+    lsn: int = field(default=0, repr=False)
+    snapshot_every: int | None = field(default=None, repr=False)
+    snapshot_lsn: int = field(default=0, repr=False)
+    _snapshot_thread: threading.Thread | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _snapshot_error: Exception | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _snapshot_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+    _lock: threading.RLock = field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
+    # The number of open transactions for each snapshot LSN.
+    _active_snapshots: Counter[int] = field(
+        default_factory=Counter, init=False, repr=False, compare=False
+    )
+    # Old versions of the records; only kept while transactions might need them.
+    _history: History = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _indexes: dict[str, HashIndex] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _savepoints: Savepoints = field(
+        default_factory=Savepoints, init=False, repr=False, compare=False
+    )
+    _subscriptions: list[Subscription] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    # Change sets of finished commits with the subscriptions they go to, in LSN
+    # order; `_publish()` hands them out once the commits are durable.
+    _unpublished: deque[tuple[ChangeSet, list[Subscription]]] = field(
+        default_factory=deque, init=False, repr=False, compare=False
+    )
+    _publish_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def open(
+        cls,
+        path: str | Path,
+        sync_every: int = 1,
+        snapshot_every: int | None = None,
+        compact: bool = False,
+    ) -> "AugurDatabase":
+        """Open a durable database that writes its commits to the log at `path`.
+
+        The records are restored from the latest snapshot and the log entries after
+        it. If `snapshot_every` is set, a snapshot is written in the background after
+        that many commits. If `compact` is true, the records are stored as
+        `CompactRecords`.
+
+        >>> from tempfile import TemporaryDirectory
+        >>> with TemporaryDirectory() as directory:
+        ...     with AugurDatabase.open(Path(directory) / "augur.log") as db:
+        ...         db.start_transaction()
+        ...         db.store_field("obj1", "field1", 1)
+        ...         db.commit_transaction()
+        ...     with AugurDatabase.open(Path(directory) / "augur.log") as db:
+        ...         db.records, db.lsn
+        ({'obj1': {'field1': 1}}, 1)
+        """
+        path = Path(path)
+        snapshot_lsn, records = read_snapshot(
+            cls._snapshot_path(path), CompactRecords() if compact else None
+        )
+        log = WriteAheadLog(path, sync_every, start_lsn=snapshot_lsn)
+        db = cls(
+            records=records,
+            log=log,
+            lsn=snapshot_lsn,
+            snapshot_every=snapshot_every,
+            snapshot_lsn=snapshot_lsn,
+        )
+        for lsn, changes in log.replay(after_lsn=snapshot_lsn):
+            db._apply_changes(changes)
+            db.lsn = lsn
+        return db
+
+    @staticmethod
+    def _snapshot_path(log_path: Path) -> Path:
+        return log_path.with_name(log_path.name + ".snapshot")
+
+    def snapshot(self, background: bool = False):
+        """Write the records to a snapshot and remove the log entries it contains.
+
+        The snapshot is written from a copy of `records`, which is made while
+        commits wait. The copy of a `dict` is shallow; copying `CompactRecords`
+        copies their columns. If `background` is true, the copy and the snapshot
+        are made by another thread.
+
+        >>> from tempfile import TemporaryDirectory
+        >>> with TemporaryDirectory() as directory:
+        ...     with AugurDatabase.open(Path(directory) / "augur.log") as db:
+        ...         for value in range(3):
+        ...             db.start_transaction()
+        ...             db.store_field("obj1", "field1", value)
+        ...             db.commit_transaction()
+        ...         db.snapshot()
+        ...         db.start_transaction()
+        ...         db.store_field("obj2", "field1", 3)
+        ...         db.commit_transaction()
+        ...     sorted(path.name for path in Path(directory).iterdir())
+        ...     with AugurDatabase.open(Path(directory) / "augur.log") as db:
+        ...         db.records, db.lsn, db.snapshot_lsn
+        ['augur.log', 'augur.log.snapshot']
+        ({'obj1': {'field1': 2}, 'obj2': {'field1': 3}}, 4, 3)
+
+        Commits only start the snapshots requested by `snapshot_every`; they never
+        wait for them or raise their errors:
+
+        >>> with TemporaryDirectory() as directory:
+        ...     (Path(directory) / "augur.log.snapshot.tmp").mkdir()
+        ...     db = AugurDatabase.open(Path(directory) / "augur.log", snapshot_every=1)
+        ...     for value in range(3):
+        ...         with db.begin() as transaction:
+        ...             transaction.store_field("obj1", "field1", value)
+        ...     try:
+        ...         db.wait_for_snapshot()
+        ...     except OSError:
+        ...         print("The snapshot failed.")
+        ...     db.close()
+        The snapshot failed.
+        """
+        if self.log is None:
+            raise RuntimeError("Only durable databases can write snapshots.")
+        with self._snapshot_lock:
+            self.wait_for_snapshot()
+            if background:
+                self._snapshot_thread = threading.Thread(
+                    target=self._take_background_snapshot, daemon=True
+                )
+                self._snapshot_thread.start()
+            else:
+                self._take_snapshot()
+
+    def _start_snapshot_after_commit(self):
+        """Start a background snapshot unless one is running or has failed.
+
+        The decision and the start happen under `_snapshot_lock`. A committer that
+        finds it taken leaves the snapshot to its holder instead of waiting."""
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        try:
+            if not self._is_snapshot_running() and self._snapshot_error is None:
+                self._snapshot_thread = threading.Thread(
+                    target=self._take_background_snapshot, daemon=True
+                )
+                self._snapshot_thread.start()
+        finally:
+            self._snapshot_lock.release()
+
+    def _take_snapshot(self):
+        assert self.log is not None
+        with self._lock:
+            lsn = self.log.rotate()
+            records = self.records.copy()
+        write_snapshot(self._snapshot_path(self.log.path), lsn, records)
+        self.log.truncate(lsn)
+        self.snapshot_lsn = lsn
+
+    def _take_background_snapshot(self):
+        try:
+            self._take_snapshot()
+        except Exception as error:
+            self._snapshot_error = error
+
+    def wait_for_snapshot(self):
+        """Wait for a background snapshot; raise its error if it failed."""
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        if self._snapshot_error is not None:
+            error, self._snapshot_error = self._snapshot_error, None
+            raise error
+
+    def close(self):
+        if self.log is not None:
+            with self._snapshot_lock:
+                self.wait_for_snapshot()
+            self.log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start_transaction(self):
+        """Start a new transaction.
+
+        Raise a `TransactionError` if a transaction is already active.
+
+        >>> db = AugurDatabase()
+        >>> db.start_transaction()
+        >>> db.start_transaction()
+        Traceback (most recent call last):
+        ...
+        augurdb.TransactionError: Cannot start a nested transaction.
+        """
+        if self.current_transaction is None:
+            self.current_transaction = {}
+        else:
+            raise TransactionError("Cannot start a nested transaction.")
+
+    def commit_transaction(self):
+        """Commit a transaction.
+
+        Raise a `TransactionError` if no transaction is currently active.
+
+        >>> db = AugurDatabase()
+        >>> db.commit_transaction()
+        Traceback (most recent call last):
+        ...
+        augurdb.TransactionError: No active transaction.
+
+        >>> db = AugurDatabase()
+        >>> db.start_transaction()
+        >>> db.current_transaction
+        {}
+        >>> db.store_field("obj1", "field1", 1)
+        >>> db.store_field("obj2", "field1", 2)
+        >>> db.store_field("obj1", "field2", 3)
+        >>> db.store_field("obj1", "field1", 4)
+        >>> db.records
+        {}
+        >>> db.current_transaction
+        {'obj1': {'field1': 4, 'field2': 3}, 'obj2': {'field1': 2}}
+        >>> db.commit_transaction()
+        >>> db.records
+        {'obj1': {'field1': 4, 'field2': 3}, 'obj2': {'field1': 2}}
+        >>> db.current_transaction is None
+        True
+        """
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        else:
+            self._commit(self.current_transaction)
+            self.current_transaction = None
+            self._savepoints.clear()
+
+    def _commit(self, changes: Records, snapshot_lsn: int | None = None) -> int:
+        """Commit `changes` and return the LSN of the commit.
+
+        If `snapshot_lsn` is given, the commit fails with a `ConflictError` if
+        another transaction has changed one of the same fields since then."""
+        with self._lock:
+            if snapshot_lsn is not None:
+                self._check_conflicts(changes, snapshot_lsn)
+            lsn = self.lsn + 1
+            if self.log is None:
+                # Without a log, stores that pickle the records, e.g.,
+                # `SqliteRecords`, would only fail after the indexes are updated.
+                validate = getattr(self.records, "validate", None)
+                if validate is not None:
+                    validate(changes)
+            undo_index_updates = self._update_indexes(changes)
+            if self.log is not None:
+                try:
+                    self.log.append(lsn, changes)
+                except BaseException:
+                    undo_index_updates()
+                    raise
+            if self._active_snapshots:
+                self._record_history(lsn, changes)
+            self._apply_changes(changes)
+            self.lsn = lsn
+            is_subscribed = bool(self._subscriptions)
+            if is_subscribed:
+                self._unpublished.append(
+                    (ChangeSet(lsn, changes).copy(), self._subscriptions)
+                )
+        if self.log is not None:
+            self.log.commit(lsn)
+            if is_subscribed:
+                # Subscribers, e.g., replicas, must never see a commit that a crash
+                # of this process could lose, whatever `sync_every` allows.
+                self.log.sync(lsn)
+        if self._unpublished:
+            self._publish(lsn)
+        if (
+            self.log is not None
+            and self.snapshot_every is not None
+            and lsn - self.snapshot_lsn >= self.snapshot_every
+        ):
+            self._start_snapshot_after_commit()
+        return lsn
+
+    def _publish(self, durable_lsn: int):
+        """Hand the change sets of the commits up to `durable_lsn` to subscriptions.
+
+        Whoever holds `_publish_lock` publishes all waiting change sets up to its
+        own commit, so they arrive in the order of their commits. Each subscription
+        gets its own copy of the changes. Errors of subscriptions never reach the
+        committer, whose changes have already been applied."""
+        with self._publish_lock:
+            while self._unpublished and self._unpublished[0][0].lsn <= durable_lsn:
+                change_set, subscriptions = self._unpublished.popleft()
+                for subscription in subscriptions:
+                    subscription.put(change_set.copy())
+
+    def subscribe(
+        self, maxsize: int = 1000, timeout: float | None = 10.0
+    ) -> Subscription:
+        """Return a subscription to the change sets of all following commits.
+
+        Change sets are published in the order of their commits, after the commit
+        has released the lock of the database and has been synced to the log of a
+        durable database. Readers are never blocked by a full subscription, but
+        commits wait for it for at most `timeout` seconds (see `Subscription`).
+
+        >>> db = AugurDatabase()
+        >>> subscription = db.subscribe()
+        >>> db.start_transaction()
+        >>> db.store_field("obj1", "field1", 1)
+        >>> db.commit_transaction()
+        >>> subscription.get()
+        ChangeSet(lsn=1, changes={'obj1': {'field1': 1}})
+
+        Consumers in other threads follow the commits; with `maxsize=1`, each
+        commit waits until the consumer has taken the previous change set:
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> subscription = db.subscribe(maxsize=1)
+        >>> def commit_values(values, subscription):
+        ...     for value in values:
+        ...         with db.begin() as transaction:
+        ...             transaction.store_field("obj1", "field1", value)
+        ...     subscription.close()
+        >>> with ThreadPoolExecutor(1) as executor:
+        ...     _ = executor.submit(commit_values, range(2, 5), subscription)
+        ...     [change_set.lsn for change_set in subscription]
+        [2, 3, 4]
+
+        The same works in asyncio code:
+
+        >>> import asyncio
+        >>> async def follow_commits():
+        ...     subscription = db.subscribe(maxsize=1)
+        ...     loop = asyncio.get_running_loop()
+        ...     commits = loop.run_in_executor(
+        ...         None, commit_values, range(5, 7), subscription
+        ...     )
+        ...     lsns = [change_set.lsn async for change_set in subscription]
+        ...     await commits
+        ...     return lsns
+        >>> asyncio.run(follow_commits())
+        [5, 6]
+
+        A consumer that stops waiting, e.g., after a timeout, does not disturb
+        later commits, even if its event loop has been closed:
+
+        >>> async def wait_briefly(subscription):
+        ...     try:
+        ...         await asyncio.wait_for(subscription.get_async(), timeout=0.01)
+        ...     except asyncio.TimeoutError:
+        ...         return "timed out"
+        >>> subscription = db.subscribe()
+        >>> asyncio.run(wait_briefly(subscription))
+        'timed out'
+        >>> commit_values([0], subscription)
+        >>> [change_set.lsn for change_set in subscription]
+        [7]
+
+        A subscription whose consumer falls behind is closed:
+
+        >>> subscription = db.subscribe(maxsize=1, timeout=0)
+        >>> commit_values(range(8, 10), subscription)
+        >>> subscription.get().lsn
+        8
+        >>> subscription.get()
+        Traceback (most recent call last):
+        ...
+        augurdb_changes.SubscriptionClosed: The consumer fell behind.
+
+        Each subscription gets its own copy of the changes:
+
+        >>> first, second = db.subscribe(), db.subscribe()
+        >>> with db.begin() as transaction:
+        ...     transaction.store_field("obj1", "field1", 10)
+        >>> first.get().changes["obj1"]["field1"] = 0
+        >>> second.get()
+        ChangeSet(lsn=10, changes={'obj1': {'field1': 10}})
+
+        With subscribers, a durable database syncs every commit to its log before
+        publishing it, even if `sync_every` would allow it to wait:
+
+        >>> from tempfile import TemporaryDirectory
+        >>> with TemporaryDirectory() as directory:
+        ...     path = Path(directory) / "augur.log"
+        ...     with AugurDatabase.open(path, sync_every=100) as durable_db:
+        ...         subscription = durable_db.subscribe()
+        ...         with durable_db.begin() as transaction:
+        ...             transaction.store_field("obj1", "field1", 1)
+        ...         durable_db.log.stats.syncs, subscription.get().lsn
+        (1, 1)
+        """
+        subscription = Subscription(self, maxsize, timeout)
+        with self._lock:
+            self._subscriptions = [*self._subscriptions, subscription]
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = [
+                s for s in self._subscriptions if s is not subscription
+            ]
+
+    def _check_conflicts(self, changes: Records, snapshot_lsn: int):
+        for obj_id, new_values in changes.items():
+            for lsn, _, changed_fields in self._history.get(obj_id, ()):
+                if lsn > snapshot_lsn and not changed_fields.isdisjoint(new_values):
+                    raise ConflictError(
+                        f"Object {obj_id!r} was changed by a concurrent transaction."
+                    )
+
+    def _record_history(self, lsn: int, changes: Records):
+        # Readers look at `records` before `_history`, so the old version has to
+        # be added to the history before the record is replaced.
+        for obj_id, new_values in changes.items():
+            self._history.setdefault(obj_id, []).append(
+                (lsn, self.records.get(obj_id), frozenset(new_values))
+            )
+
+    def create_index(self, field_name: str, index_type: type[HashIndex] = HashIndex):
+        """Create an index for the values of the field `field_name`.
+
+        Indexes are updated by every commit; queries always see the latest
+        committed state.
+
+        >>> db = AugurDatabase()
+        >>> db.create_index("department")
+        >>> db.create_index("salary", SortedIndex)
+        >>> db.start_transaction()
+        >>> db.store_field("obj1", "department", "IT")
+        >>> db.store_field("obj1", "salary", 5000)
+        >>> db.store_field("obj2", "department", "HR")
+        >>> db.store_field("obj2", "salary", 4000)
+        >>> db.commit_transaction()
+        >>> db.find("department", "IT")
+        {'obj1'}
+        >>> db.find_range("salary", max_value=4500)
+        ['obj2']
+
+        A commit that cannot be indexed changes neither records nor indexes:
+
+        >>> db.start_transaction()
+        >>> db.store_field("obj1", "department", "HR")
+        >>> db.store_field("obj1", "salary", "high")
+        >>> db.commit_transaction()
+        Traceback (most recent call last):
+        ...
+        TypeError: '<' not supported between instances of 'str' and 'int'
+        >>> db.find("department", "HR"), db.records["obj1"]["department"]
+        ({'obj2'}, 'IT')
+        """
+        index = index_type(field_name)
+        with self._lock:
+            for obj_id, record in self.records.items():
+                if field_name in record:
+                    index.add(obj_id, record[field_name])
+            self._indexes[field_name] = index
+
+    def find(self, field_name: str, value) -> set:
+        """Return the ids of the objects whose field `field_name` equals `value`."""
+        with self._lock:
+            return self._index(field_name).find(value)
+
+    def find_range(self, field_name: str, min_value=None, max_value=None) -> list:
+        """Return the ids of the objects with values of `field_name` in a range.
+
+        Both limits are inclusive; the ids are ordered by the values of the field.
+        Queries wait for running commits, so they see every commit completely:
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> db = AugurDatabase()
+        >>> db.create_index("salary", SortedIndex)
+        >>> def change_salaries(num_commits):
+        ...     for commit in range(num_commits):
+        ...         with db.begin() as transaction:
+        ...             for employee in range(20):
+        ...                 salary = (commit + employee) % 5
+        ...                 transaction.store_field(f"obj{employee}", "salary", salary)
+        >>> change_salaries(1)
+        >>> with ThreadPoolExecutor(1) as executor:
+        ...     commits = executor.submit(change_salaries, 2000)
+        ...     while not commits.done():
+        ...         assert len(db.find_range("salary", 1, 3)) == 12
+        ...     commits.result()
+        """
+        with self._lock:
+            index = self._index(field_name)
+            if not isinstance(index, SortedIndex):
+                raise TypeError(f"The index for {field_name!r} is not sorted.")
+            return index.find_range(min_value, max_value)
+
+    def _index(self, field_name: str) -> HashIndex:
+        try:
+            return self._indexes[field_name]
+        except KeyError:
+            raise KeyError(f"There is no index for {field_name!r}.") from None
+
+    def _update_indexes(self, changes: Records) -> Callable[[], None]:
+        """Update the indexes for `changes` and return a function that undoes it.
+
+        If an index cannot store a value, all updates are undone."""
+        undo_operations: list[Callable[[], None]] = []
+
+        def undo():
+            for operation in reversed(undo_operations):
+                operation()
+
+        if not self._indexes:
+            return undo
+        try:
+            for obj_id, new_values in changes.items():
+                old_values = self.records.get(obj_id) or {}
+                for name, value in new_values.items():
+                    index = self._indexes.get(name)
+                    if index is None:
+                        continue
+                    if name in old_values:
+                        old_value = old_values[name]
+                        if old_value == value:
+                            continue
+                        index.remove(obj_id, old_value)
+                        undo_operations.append(partial(index.add, obj_id, old_value))
+                    index.add(obj_id, value)
+                    undo_operations.append(partial(index.remove, obj_id, value))
+        except BaseException:
+            undo()
+            raise
+        return undo
+
+    def _is_snapshot_running(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def begin(self) -> "Transaction":
+        """Start a transaction that has its own snapshot of the database.
+
+        Any number of these transactions can be active at the same time, also in
+        different threads; they are independent of `start_transaction()`.
+
+        >>> db = AugurDatabase()
+        >>> with db.begin() as transaction:
+        ...     transaction.store_field("obj1", "field1", 1)
+        >>> db.records
+        {'obj1': {'field1': 1}}
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> def store(obj_id):
+        ...     with db.begin() as transaction:
+        ...         value = transaction.read_field("obj1", "field1")
+        ...         transaction.store_field(obj_id, "field1", value + 1)
+        >>> with ThreadPoolExecutor(4) as executor:
+        ...     _ = list(executor.map(store, ["obj2", "obj3", "obj4"]))
+        >>> [db.records[obj_id] for obj_id in ["obj2", "obj3", "obj4"]]
+        [{'field1': 2}, {'field1': 2}, {'field1': 2}]
+
+        Transactions can read `CompactRecords` while commits add fields to the
+        objects, which moves them to other shapes:
+
+        >>> import sys
+        >>> db = AugurDatabase(records=CompactRecords())
+        >>> def change_fields(num_commits):
+        ...     for commit in range(num_commits):
+        ...         with db.begin() as transaction:
+        ...             obj_id, name = f"obj{commit % 50}", f"field{commit // 50}"
+        ...             transaction.store_field(obj_id, name, commit)
+        >>> def read_records():
+        ...     with db.begin() as transaction:
+        ...         return [transaction.read_record(f"obj{i}") for i in range(50)]
+        >>> change_fields(50)
+        >>> switch_interval = sys.getswitchinterval()
+        >>> sys.setswitchinterval(1e-6)
+        >>> with ThreadPoolExecutor(1) as executor:
+        ...     commits = executor.submit(change_fields, 2000)
+        ...     while not commits.done():
+        ...         _ = read_records()
+        ...     commits.result()
+        >>> sys.setswitchinterval(switch_interval)
+        """
+        with self._lock:
+            snapshot_lsn = self.lsn
+            self._active_snapshots[snapshot_lsn] += 1
+        return Transaction(self, snapshot_lsn)
+
+    def _end_transaction(self, snapshot_lsn: int):
+        with self._lock:
+            self._active_snapshots[snapshot_lsn] -= 1
+            if self._active_snapshots[snapshot_lsn] > 0:
+                return
+            del self._active_snapshots[snapshot_lsn]
+            if not self._active_snapshots:
+                self._history.clear()
+            elif snapshot_lsn < min(self._active_snapshots):
+                self._prune_history(min(self._active_snapshots))
+
+    def _prune_history(self, oldest_snapshot_lsn: int):
+        """Drop the versions that were replaced before the oldest snapshot."""
+        for obj_id, versions in list(self._history.items()):
+            recent_versions = [v for v in versions if v[0] > oldest_snapshot_lsn]
+            if recent_versions:
+                self._history[obj_id] = recent_versions
+            else:
+                del self._history[obj_id]
+
+    def _read_record(self, obj_id, snapshot_lsn: int) -> dict[str, Any] | None:
+        """Return the record of `obj_id` as of `snapshot_lsn`.
+
+        Reading a record from a `dict` is atomic, so readers do not wait for
+        commits. Other stores, e.g., `CompactRecords`, move rows while a commit
+        changes them and are only read under the lock."""
+        with nullcontext() if type(self.records) is dict else self._lock:
+            record = self.records.get(obj_id)
+            for lsn, old_record, _ in self._history.get(obj_id, ()):
+                if lsn > snapshot_lsn:
+                    return old_record
+            return record
+
+    def _apply_changes(self, changes: Records):
+        # Records are replaced instead of updated, so that snapshots only need a
+        # shallow copy of `records`.
+        new_records = {}
+        for obj_id, new_values in changes.items():
+            old_values = self.records.get(obj_id)
+            if old_values is None:
+                new_records[obj_id] = dict(new_values)
+            else:
+                new_records[obj_id] = {**old_values, **new_values}
+        self.records.update(new_records)
+
+    def rollback_transaction(self):
+        """Roll back the current transaction.
+
+        Raise a `TransactionError` if no transaction is currently active.
+
+        >>> db = AugurDatabase()
+        >>> db.rollback_transaction()
+        Traceback (most recent call last):
+        ...
+        augurdb.TransactionError: No active transaction.
+
+        >>> db = AugurDatabase()
+        >>> db.start_transaction()
+        >>> db.current_transaction
+        {}
+        >>> db.store_field("obj1", "field1", 1)
+        >>> db.records
+        {}
+        >>> db.current_transaction
+        {'obj1': {'field1': 1}}
+        >>> db.rollback_transaction()
+        >>> db.records
+        {}
+        >>> db.current_transaction is None
+        True
+        """
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        else:
+            self.current_transaction = None
+            self._savepoints.clear()
+
+    def savepoint(self) -> int:
+        """Create a savepoint in the current transaction and return its number.
+
+        Raise a `TransactionError` if no transaction is currently active.
+
+        >>> db = AugurDatabase()
+        >>> db.start_transaction()
+        >>> db.store_field("obj1", "field1", 1)
+        >>> savepoint = db.savepoint()
+        >>> db.store_field("obj1", "field1", 2)
+        >>> db.store_field("obj1", "field2", 3)
+        >>> db.rollback_to_savepoint(savepoint)
+        >>> db.store_field("obj2", "field1", 4)
+        >>> db.release_savepoint(savepoint)
+        >>> db.commit_transaction()
+        >>> db.records
+        {'obj1': {'field1': 1}, 'obj2': {'field1': 4}}
+        """
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        return self._savepoints.create()
+
+    def rollback_to_savepoint(self, savepoint: int):
+        """Undo the changes made since `savepoint` was created."""
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        self._savepoints.rollback_to(self.current_transaction, savepoint)
+
+    def release_savepoint(self, savepoint: int):
+        """Remove `savepoint` and all later savepoints; the changes are kept."""
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        self._savepoints.release(savepoint)
+
+    def store_field(self, obj_id, name, value):
+        """Store the value for a field in the current transaction.
+
+        Raise a `TransactionError` if no transaction is currently active.
+
+        >>> db = AugurDatabase()
+        >>> db.store_field("obj1", "field1", 1)
+        Traceback (most recent call last):
+        ...
+        augurdb.TransactionError: No active transaction.
+
+        >>> db = AugurDatabase()
+        >>> db.start_transaction()
+        >>> db.store_field("obj1", "field1", 1)
+        >>> db.store_field("obj2", "field1", 2)
+        >>> db.store_field("obj1", "field2", 3)
+        >>> db.commit_transaction()
+        >>> db.records
+        {'obj1': {'field1': 1, 'field2': 3}, 'obj2': {'field1': 2}}
+        """
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        else:
+            self._savepoints.store(self.current_transaction, obj_id, name, value)
+
+    def store_many(self, field_values: FieldValues):
+        """Store many field values in the current transaction.
+
+        `field_values` is either an iterable of `(obj_id, name, value)` tuples or a
+        `ColumnBatch`. Raise a `TransactionError` if no transaction is currently
+        active.
+
+        >>> db = AugurDatabase()
+        >>> db.start_transaction()
+        >>> db.store_many([("obj1", "field1", 1), ("obj2", "field1", 2)])
+        >>> db.store_many(ColumnBatch(["obj1", "obj2"], {"field2": [3, 4]}))
+        >>> db.commit_transaction()
+        >>> db.records
+        {'obj1': {'field1': 1, 'field2': 3}, 'obj2': {'field1': 2, 'field2': 4}}
+        """
+        if self.current_transaction is None:
+            raise TransactionError("No active transaction.")
+        else:
+            self._savepoints.store_many(self.current_transaction, field_values)
+
+    @classmethod
+    def bulk_load(cls, *sources: FieldValues, compact: bool = False) -> "AugurDatabase":
+        """Create a database that contains the field values of all `sources`.
+
+        The values are stored directly in the records, without a transaction.
+
+        >>> db = AugurDatabase.bulk_load(
+        ...     [("obj1", "field1", 1)], ColumnBatch(["obj1"], {"field2": [2]})
+        ... )
+        >>> db.records
+        {'obj1': {'field1': 1, 'field2': 2}}
+        """
+        records: Records = {}
+        for field_values in sources:
+            merge_field_values(records, field_values)
+        return cls(records=CompactRecords(records) if compact else records)
+
+
+# %%
+class Transaction:
+    """A transaction with snapshot isolation.
+
+    Reads see the database as it was when the transaction started, plus the
+    changes of the transaction itself. Conflicts are detected when committing: if
+    another transaction has committed a change to one of the fields changed by
+    this transaction in the meantime, `commit()` raises a `ConflictError`.
+
+    >>> db = AugurDatabase()
+    >>> first, second = db.begin(), db.begin()
+    >>> first.store_field("obj1", "field1", 1)
+    >>> first.commit()
+    1
+    >>> second.read_record("obj1")
+    Traceback (most recent call last):
+    ...
+    KeyError: 'obj1'
+    >>> second.store_field("obj1", "field1", 2)
+    >>> second.commit()
+    Traceback (most recent call last):
+    ...
+    augurdb_database.ConflictError: Object 'obj1' was changed by a concurrent transaction.
+    >>> db.records
+    {'obj1': {'field1': 1}}
+    """
+
+    def __init__(self, database: AugurDatabase, snapshot_lsn: int):
+        self.database = database
+        self.snapshot_lsn = snapshot_lsn
+        self.changes: Records = {}
+        self.is_active = True
+        self._savepoints = Savepoints()
+
+    def read_record(self, obj_id) -> dict[str, Any]:
+        """Return the fields of `obj_id`; raise a `KeyError` if it does not exist."""
+        self._check_active()
+        record = self.database._read_record(obj_id, self.snapshot_lsn)
+        changes = self.changes.get(obj_id)
+        if record is None and changes is None:
+            raise KeyError(obj_id)
+        return {**(record or {}), **(changes or {})}
+
+    def read_field(self, obj_id, name) -> Any:
+        return self.read_record(obj_id)[name]
+
+    def store_field(self, obj_id, name, value):
+        self._check_active()
+        self._savepoints.store(self.changes, obj_id, name, value)
+
+    def store_many(self, field_values: FieldValues):
+        self._check_active()
+        self._savepoints.store_many(self.changes, field_values)
+
+    def savepoint(self) -> int:
+        self._check_active()
+        return self._savepoints.create()
+
+    def rollback_to_savepoint(self, savepoint: int):
+        self._check_active()
+        self._savepoints.rollback_to(self.changes, savepoint)
+
+    def release_savepoint(self, savepoint: int):
+        self._check_active()
+        self._savepoints.release(savepoint)
+
+    def commit(self) -> int:
+        """Commit the transaction and return the LSN of the commit."""
+        self._check_active()
+        try:
+            return self.database._commit(self.changes, self.snapshot_lsn)
+        finally:
+            self._end()
+
+    def rollback(self):
+        self._check_active()
+        self._end()
+
+    def _end(self):
+        self.is_active = False
+        self.database._end_transaction(self.snapshot_lsn)
+
+    def _check_active(self):
+        if not self.is_active:
+            raise TransactionError("Transaction is no longer active.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.is_active:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
@@ -0,0 +1,73 @@
+# %%
+from bisect import bisect_left, bisect_right, insort
+from typing import Any
+
+
+# %%
+class HashIndex:
+    """An index that finds the objects with a given value of a field.
+
+    >>> index = HashIndex("department")
+    >>> index.add("obj1", "IT")
+    >>> index.add("obj2", "IT")
+    >>> index.remove("obj1", "IT")
+    >>> index.find("IT"), index.find("HR")
+    ({'obj2'}, set())
+    """
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self._obj_ids: dict[Any, set] = {}
+
+    def add(self, obj_id, value):
+        self._obj_ids.setdefault(value, set()).add(obj_id)
+
+    def remove(self, obj_id, value):
+        obj_ids = self._obj_ids[value]
+        obj_ids.discard(obj_id)
+        if not obj_ids:
+            del self._obj_ids[value]
+
+    def find(self, value) -> set:
+        return set(self._obj_ids.get(value, ()))
+
+
+class SortedIndex(HashIndex):
+    """An index that also finds the objects with a value of a field in a range.
+
+    >>> index = SortedIndex("salary")
+    >>> for obj_id, salary in [("obj1", 3000), ("obj2", 5000), ("obj3", 4000)]:
+    ...     index.add(obj_id, salary)
+    >>> index.find_range(3500), index.find_range(3000, 4000)
+    (['obj3', 'obj2'], ['obj1', 'obj3'])
+    """
+
+    def __init__(self, field_name: str):
+        super().__init__(field_name)
+        self._values: list = []
+
+    def add(self, obj_id, value):
+        if value not in self._obj_ids:
+            insort(self._values, value)
+        super().add(obj_id, value)
+
+    def remove(self, obj_id, value):
+        super().remove(obj_id, value)
+        if value not in self._obj_ids:
+            del self._values[bisect_left(self._values, value)]
+
+    def find_range(self, min_value=None, max_value=None) -> list:
+        """Return the objects with values between `min_value` and `max_value`.
+
+        Both limits are inclusive; the objects are ordered by value."""
+        start = 0 if min_value is None else bisect_left(self._values, min_value)
+        stop = (
+            len(self._values)
+            if max_value is None
+            else bisect_right(self._values, max_value)
+        )
+        return [
+            obj_id
+            for value in self._values[start:stop]
+            for obj_id in self._obj_ids[value]
+        ]
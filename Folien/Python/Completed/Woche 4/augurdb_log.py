@@ -0,0 +1,243 @@
+# %%
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+from augurdb_records import RecordStore, Records
+
+
+# %%
+@dataclass
+class CommitStats:
+    commits: int = 0
+    syncs: int = 0
+    seconds: float = 0.0
+
+    @property
+    def commits_per_second(self) -> float:
+        return self.commits / self.seconds if self.seconds > 0 else 0.0
+
+
+# %%
+class WriteAheadLog:
+    """An append-only file of committed transactions.
+
+    Each entry is written as a frame of LSN (log sequence number), payload size,
+    and checksum, followed by the pickled changes. A frame that was only partially
+    written when the process crashed is removed when the log is opened.
+
+    Committers share their fsync calls (group commit): a committer that has to
+    wait for an fsync makes all entries written so far durable. With
+    `sync_every` > 1, the log is only synced after that many entries, so a crash of
+    the machine may lose the most recent commits.
+
+    >>> from tempfile import TemporaryDirectory
+    >>> with TemporaryDirectory() as directory:
+    ...     log = WriteAheadLog(Path(directory) / "augur.log")
+    ...     log.append(1, {"obj1": {"field1": 1}})
+    ...     log.commit(1)
+    ...     log.close()
+    ...     with open(Path(directory) / "augur.log", "ab") as file:
+    ...         _ = file.write(b"torn frame")
+    ...     log = WriteAheadLog(Path(directory) / "augur.log")
+    ...     log.last_lsn, list(log.replay())
+    ...     log.close()
+    (1, [(1, {'obj1': {'field1': 1}})])
+    """
+
+    _FRAME_HEADER = struct.Struct("<QII")
+
+    def __init__(self, path: str | Path, sync_every: int = 1, start_lsn: int = 0):
+        if sync_every < 1:
+            raise ValueError("sync_every must be positive.")
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.stats = CommitStats()
+        segments = self._segments()
+        self.last_lsn = max(start_lsn, segments[-1][0] if segments else 0)
+        size = 0
+        for size, self.last_lsn, _ in self._frames(self.path):
+            pass
+        self._file = open(self.path, "ab", buffering=0)
+        self._file.truncate(size)
+        self._synced_lsn = self.last_lsn
+        self._syncing = False
+        self._condition = threading.Condition()
+
+    def replay(self, after_lsn: int = 0) -> Iterator[tuple[int, Records]]:
+        """Yield the LSN and the changes of every entry after `after_lsn`."""
+        paths = [segment_path for _, segment_path in self._segments()]
+        for path in [*paths, self.path]:
+            for _, lsn, payload in self._frames(path):
+                if lsn > after_lsn:
+                    yield lsn, pickle.loads(payload)
+
+    def _segments(self) -> list[tuple[int, Path]]:
+        """Return the last LSN and path of each rotated segment, in LSN order."""
+        segments = []
+        for segment_path in self.path.parent.glob(f"{self.path.name}.*"):
+            suffix = segment_path.name[len(self.path.name) + 1 :]
+            if suffix.isdigit():
+                segments.append((int(suffix), segment_path))
+        return sorted(segments)
+
+    @classmethod
+    def _frames(cls, path: Path) -> Iterator[tuple[int, int, bytes]]:
+        """Yield the end offset, LSN and payload of each complete frame.
+
+        The frames are read one at a time, so only one payload is in memory."""
+        if not path.exists():
+            return
+        header = cls._FRAME_HEADER
+        offset = 0
+        with open(path, "rb") as file:
+            while len(header_data := file.read(header.size)) == header.size:
+                lsn, size, checksum = header.unpack(header_data)
+                payload = file.read(size)
+                if len(payload) < size or zlib.crc32(payload) != checksum:
+                    return
+                offset += header.size + size
+                yield offset, lsn, payload
+
+    def append(self, lsn: int, changes: Records):
+        """Write the changes of a transaction; call `commit()` to make them durable.
+
+        Entries have to be appended in the order of their LSNs."""
+        start_time = time.perf_counter()
+        payload = pickle.dumps(changes, protocol=pickle.HIGHEST_PROTOCOL)
+        frame = self._FRAME_HEADER.pack(lsn, len(payload), zlib.crc32(payload))
+        with self._condition:
+            self._file.write(frame + payload)
+            self.last_lsn = lsn
+        self.stats.seconds += time.perf_counter() - start_time
+
+    def commit(self, lsn: int):
+        """Wait until the entry `lsn` is durable, as far as `sync_every` requires."""
+        start_time = time.perf_counter()
+        with self._condition:
+            must_sync = self.last_lsn - self._synced_lsn >= self.sync_every
+        if must_sync:
+            self.sync(lsn)
+        self.stats.commits += 1
+        self.stats.seconds += time.perf_counter() - start_time
+
+    def sync(self, lsn: int | None = None):
+        """Make all entries up to `lsn` (by default: all entries) durable."""
+        with self._condition:
+            if lsn is None:
+                lsn = self.last_lsn
+            while self._synced_lsn < lsn:
+                if self._syncing:
+                    self._condition.wait()
+                    continue
+                self._syncing = True
+                sync_lsn = self.last_lsn
+                # Other committers can append while this thread waits for fsync.
+                self._condition.release()
+                try:
+                    os.fsync(self._file.fileno())
+                finally:
+                    self._condition.acquire()
+                    self._syncing = False
+                    self._condition.notify_all()
+                self._synced_lsn = sync_lsn
+                self.stats.syncs += 1
+
+    def rotate(self) -> int:
+        """Continue the log in a new file and return the last LSN of the old one.
+
+        The old file is kept as a segment until `truncate()` removes it."""
+        with self._condition:
+            while self._syncing:
+                self._condition.wait()
+            lsn = self.last_lsn
+            if self._file.tell() > 0:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self.path.rename(self.path.with_name(f"{self.path.name}.{lsn}"))
+                _sync_directory(self.path.parent)
+                self._file = open(self.path, "ab", buffering=0)
+            self._synced_lsn = lsn
+            return lsn
+
+    def truncate(self, lsn: int):
+        """Remove the rotated segments that only contain entries up to `lsn`."""
+        for segment_lsn, segment_path in self._segments():
+            if segment_lsn <= lsn:
+                segment_path.unlink()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+# %%
+_SNAPSHOT_MAGIC = b"AUGS"
+_SNAPSHOT_HEADER = struct.Struct("<4sQ")
+_SNAPSHOT_CHUNK_SIZE = 10_000
+
+
+def _sync_directory(path: Path):
+    """Make renames in the directory `path` durable (only possible on POSIX)."""
+    if os.name == "posix":
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def write_snapshot(path: str | Path, lsn: int, records: RecordStore):
+    """Atomically replace the snapshot at `path` with `records` as of `lsn`.
+
+    The records are pickled in chunks, so that other threads can run in between.
+    """
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+    items = iter(records.items())
+    with open(temp_path, "wb") as file:
+        file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, lsn))
+        while chunk := list(islice(items, _SNAPSHOT_CHUNK_SIZE)):
+            pickle.dump(chunk, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    _sync_directory(path.parent)
+
+
+def read_snapshot(
+    path: str | Path, records: RecordStore | None = None
+) -> tuple[int, RecordStore]:
+    """Return the LSN and the records of a snapshot, or `(0, {})` if there is none.
+
+    The records are added to `records` if it is given.
+
+    >>> from tempfile import TemporaryDirectory
+    >>> with TemporaryDirectory() as directory:
+    ...     write_snapshot(Path(directory) / "augur.snapshot", 3, {"obj1": {"a": 1}})
+    ...     read_snapshot(Path(directory) / "augur.snapshot")
+    (3, {'obj1': {'a': 1}})
+    """
+    if records is None:
+        records = {}
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return 0, records
+    with file:
+        magic, lsn = _SNAPSHOT_HEADER.unpack(file.read(_SNAPSHOT_HEADER.size))
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot.")
+        while True:
+            try:
+                records.update(pickle.load(file))
+            except EOFError:
+                return lsn, records
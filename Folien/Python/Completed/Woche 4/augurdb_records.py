@@ -0,0 +1,502 @@
+# %%
+import pickle
+import sqlite3
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+# %%
+Records = dict[str, dict[str, Any]]
+# Any mapping that can hold the records of a database, e.g., `CompactRecords`.
+RecordStore = MutableMapping[Any, dict[str, Any]]
+
+
+# %%
+@dataclass
+class ColumnBatch:
+    """Values of several fields for many objects, one sequence per field."""
+
+    obj_ids: Sequence
+    columns: dict[str, Sequence]
+
+    def __post_init__(self):
+        if any(len(values) != len(self.obj_ids) for values in self.columns.values()):
+            raise ValueError("All columns must have a value for each object.")
+
+
+FieldValues = Iterable[tuple[Any, str, Any]] | ColumnBatch
+
+
+def merge_field_values(records: Records, field_values: FieldValues):
+    """Store field values in `records`.
+
+    >>> records = {}
+    >>> merge_field_values(records, [("obj1", "a", 1), ("obj2", "a", 2)])
+    >>> merge_field_values(records, ColumnBatch(["obj1", "obj3"], {"b": [3, 4]}))
+    >>> records
+    {'obj1': {'a': 1, 'b': 3}, 'obj2': {'a': 2}, 'obj3': {'b': 4}}
+    """
+    get_record = records.get
+    if isinstance(field_values, ColumnBatch):
+        obj_ids = field_values.obj_ids
+        for name, values in field_values.columns.items():
+            for obj_id, value in zip(obj_ids, values):
+                record = get_record(obj_id)
+                if record is None:
+                    records[obj_id] = {name: value}
+                else:
+                    record[name] = value
+    else:
+        for obj_id, name, value in field_values:
+            record = get_record(obj_id)
+            if record is None:
+                records[obj_id] = {name: value}
+            else:
+                record[name] = value
+
+
+# %%
+class _Shape:
+    """The storage for all objects that have the same fields in the same order."""
+
+    __slots__ = ("fields", "shape_id", "obj_ids", "columns")
+
+    def __init__(self, fields: tuple[str, ...], shape_id: int):
+        self.fields = fields
+        self.shape_id = shape_id
+        self.obj_ids: list = []
+        self.columns: list[array | list] = [[] for _ in fields]
+
+
+# The type codes of the arrays that store columns of ints or floats.
+_ARRAY_TYPECODES = {int: "q", float: "d"}
+
+
+def _store_in_column(column: array | list, row: int, value) -> array | list:
+    """Store `value` in `column` and return the column.
+
+    Columns of ints or floats are stored as arrays. A value of any other type,
+    e.g., an int in a column of floats or a bool in a column of ints, converts the
+    column into a list; so does an int that does not fit into 64 bits."""
+    typecode = _ARRAY_TYPECODES.get(type(value))
+    if isinstance(column, list):
+        if not column and typecode is not None:
+            column = array(typecode)
+    elif column.typecode != typecode:
+        column = list(column)
+    try:
+        _store_in_row(column, row, value)
+    except OverflowError:
+        column = list(column)
+        _store_in_row(column, row, value)
+    return column
+
+
+def _store_in_row(column: array | list, row: int, value):
+    if row == len(column):
+        column.append(value)
+    else:
+        column[row] = value
+
+
+class CompactRecords(MutableMapping):
+    """A mapping from object ids to records that stores records in columns.
+
+    Objects with the same fields share a shape; each shape stores the values of a
+    field in a single column, an array for ints and floats. Field names are
+    interned. The records returned by the mapping are copies: changing them does
+    not change the stored records.
+
+    >>> records = CompactRecords()
+    >>> records["obj1"] = {"name": "Joe", "salary": 5000}
+    >>> records["obj2"] = {"name": "Jane", "salary": 6000}
+    >>> records["obj1"] = {"name": "Joe", "salary": 5500, "department": "IT"}
+    >>> records["obj1"]
+    {'name': 'Joe', 'salary': 5500, 'department': 'IT'}
+    >>> records == {"obj1": records["obj1"], "obj2": {"name": "Jane", "salary": 6000}}
+    True
+    >>> for shape in records.shapes:
+    ...     print(shape.fields, shape.columns)
+    ('name', 'salary') [['Jane'], array('q', [6000])]
+    ('name', 'salary', 'department') [['Joe'], array('q', [5500]), ['IT']]
+
+    Values keep their types, also if they differ from the other values of their
+    column:
+
+    >>> records = CompactRecords()
+    >>> records["obj1"] = {"salary": 4500.5, "active": 1}
+    >>> records["obj2"] = {"salary": 4000, "active": True}
+    >>> records["obj3"] = {"salary": 2**64, "active": 0}
+    >>> records["obj2"], records["obj3"]
+    ({'salary': 4000, 'active': True}, {'salary': 18446744073709551616, 'active': 0})
+    >>> records.shapes[0].columns
+    [[4500.5, 4000, 18446744073709551616], [1, True, 0]]
+    """
+
+    _ROW_SHIFT = 20
+
+    def __init__(self, records: Records | None = None):
+        self.shapes: list[_Shape] = []
+        self._shapes_by_fields: dict[tuple[str, ...], _Shape] = {}
+        # Shape id and row of each object, packed into a single int.
+        self._locations: dict[Any, int] = {}
+        if records:
+            self.update(records)
+
+    def __getitem__(self, obj_id) -> dict[str, Any]:
+        shape, row = self._location(obj_id)
+        return dict(zip(shape.fields, [column[row] for column in shape.columns]))
+
+    def __setitem__(self, obj_id, record: dict[str, Any]):
+        fields = tuple(record)
+        location = self._locations.get(obj_id)
+        if location is not None:
+            shape, row = self._location(obj_id)
+            if shape.fields != fields:
+                self._remove(shape, row)
+                location = None
+        if location is None:
+            shape = self._shape(fields)
+            row = len(shape.obj_ids)
+            shape.obj_ids.append(obj_id)
+            self._locations[obj_id] = row << self._ROW_SHIFT | shape.shape_id
+        for position, value in enumerate(record.values()):
+            shape.columns[position] = _store_in_column(
+                shape.columns[position], row, value
+            )
+
+    def __delitem__(self, obj_id):
+        shape, row = self._location(obj_id)
+        self._remove(shape, row)
+        del self._locations[obj_id]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._locations)
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __repr__(self):
+        return f"CompactRecords({dict(self.items())!r})"
+
+    def copy(self) -> "CompactRecords":
+        result = CompactRecords()
+        for shape in self.shapes:
+            shape_copy = result._shape(shape.fields)
+            shape_copy.obj_ids = shape.obj_ids.copy()
+            shape_copy.columns = [column[:] for column in shape.columns]
+        result._locations = self._locations.copy()
+        return result
+
+    def _location(self, obj_id) -> tuple[_Shape, int]:
+        location = self._locations[obj_id]
+        shape_id = location & ((1 << self._ROW_SHIFT) - 1)
+        return self.shapes[shape_id], location >> self._ROW_SHIFT
+
+    def _shape(self, fields: tuple[str, ...]) -> _Shape:
+        shape = self._shapes_by_fields.get(fields)
+        if shape is None:
+            if len(self.shapes) >= 1 << self._ROW_SHIFT:
+                raise ValueError("Too many different sets of fields.")
+            fields = tuple(
+                sys.intern(name) if isinstance(name, str) else name for name in fields
+            )
+            shape = _Shape(fields, len(self.shapes))
+            self.shapes.append(shape)
+            self._shapes_by_fields[fields] = shape
+        return shape
+
+    def _remove(self, shape: _Shape, row: int):
+        """Remove a row by moving the last row of the shape into its place."""
+        last_row = len(shape.obj_ids) - 1
+        if row != last_row:
+            moved_obj_id = shape.obj_ids[last_row]
+            shape.obj_ids[row] = moved_obj_id
+            for column in shape.columns:
+                column[row] = column[last_row]
+            self._locations[moved_obj_id] = row << self._ROW_SHIFT | shape.shape_id
+        shape.obj_ids.pop()
+        for column in shape.columns:
+            column.pop()
+
+
+# %%
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+_FETCH_SIZE = 1000
+
+
+def _dumps(value) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _fetch_rows(cursor: sqlite3.Cursor) -> Iterator[tuple]:
+    while rows := cursor.fetchmany(_FETCH_SIZE):
+        yield from rows
+
+
+class _SqliteItemsView(ItemsView):
+    def __iter__(self):
+        for key, record in self._mapping._select("obj_id, record"):
+            yield pickle.loads(key), pickle.loads(record)
+
+
+class _SqliteValuesView(ValuesView):
+    def __iter__(self):
+        for (record,) in self._mapping._select("record"):
+            yield pickle.loads(record)
+
+
+class SqliteRecords(MutableMapping):
+    """A mapping from object ids to records that stores the records in SQLite.
+
+    The most recently used `cache_size` records are kept in memory. Records
+    returned by the mapping must not be modified. Iterating over the mapping, its
+    items or its values reads all records with a single query, without using or
+    changing the cache.
+
+    >>> from tempfile import TemporaryDirectory
+    >>> from augurdb_database import AugurDatabase
+    >>> with TemporaryDirectory() as directory:
+    ...     records = SqliteRecords(Path(directory) / "records.db", cache_size=1)
+    ...     records.update({"obj1": {"field1": 1}, "obj2": {"field1": 2}})
+    ...     records["obj1"], records["obj1"], records.stats
+    ...     db = AugurDatabase(records=records)
+    ...     db.start_transaction()
+    ...     db.store_field("obj2", "field2", 3)
+    ...     db.commit_transaction()
+    ...     records.close()
+    ...     with SqliteRecords(Path(directory) / "records.db") as records:
+    ...         dict(records)
+    ({'field1': 1}, {'field1': 1}, CacheStats(hits=1, misses=1))
+    {'obj1': {'field1': 1}, 'obj2': {'field1': 2, 'field2': 3}}
+
+    A commit with values that cannot be pickled changes neither the records nor
+    the indexes of the database:
+
+    >>> with TemporaryDirectory() as directory:
+    ...     with SqliteRecords(Path(directory) / "records.db") as records:
+    ...         db = AugurDatabase(records=records)
+    ...         db.create_index("field1")
+    ...         db.start_transaction()
+    ...         db.store_field("obj1", "field1", 1)
+    ...         db.store_field("obj1", "field2", threading.Lock())
+    ...         db.commit_transaction()
+    Traceback (most recent call last):
+    ...
+    TypeError: cannot pickle '_thread.lock' object
+    >>> db.find("field1", 1)
+    set()
+    """
+
+    def __init__(self, path: str | Path, cache_size: int = 10_000):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self.stats = CacheStats()
+        self._cache: OrderedDict[Any, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS records (obj_id BLOB PRIMARY KEY, record BLOB)"
+        )
+
+    @staticmethod
+    def _key(obj_id) -> bytes:
+        return _dumps(obj_id)
+
+    def __getitem__(self, obj_id) -> dict[str, Any]:
+        with self._lock:
+            record = self._cache.get(obj_id)
+            if record is not None:
+                self._cache.move_to_end(obj_id)
+                self.stats.hits += 1
+                return record
+            self.stats.misses += 1
+            row = self._connection.execute(
+                "SELECT record FROM records WHERE obj_id = ?", (self._key(obj_id),)
+            ).fetchone()
+            if row is None:
+                raise KeyError(obj_id)
+            record = pickle.loads(row[0])
+            self._cache_record(obj_id, record)
+            return record
+
+    def __setitem__(self, obj_id, record: dict[str, Any]):
+        self.update({obj_id: record})
+
+    def update(self, records=(), /, **kwargs):
+        """Store many records in a single SQLite transaction."""
+        records = dict(records, **kwargs)
+        rows = [
+            (self._key(obj_id), _dumps(record)) for obj_id, record in records.items()
+        ]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?)", rows
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            for obj_id, record in records.items():
+                self._cache_record(obj_id, record)
+
+    def __delitem__(self, obj_id):
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM records WHERE obj_id = ?", (self._key(obj_id),)
+            )
+            self._cache.pop(obj_id, None)
+            if cursor.rowcount == 0:
+                raise KeyError(obj_id)
+
+    def validate(self, records: Records):
+        """Raise the error that storing `records` would raise, e.g., for values
+        that cannot be pickled."""
+        for obj_id, record in records.items():
+            self._key(obj_id)
+            _dumps(record)
+
+    def __iter__(self) -> Iterator:
+        for (key,) in self._select("obj_id"):
+            yield pickle.loads(key)
+
+    def items(self) -> ItemsView:
+        return _SqliteItemsView(self)
+
+    def values(self) -> ValuesView:
+        return _SqliteValuesView(self)
+
+    def _select(self, columns: str) -> Iterator[tuple]:
+        # A separate connection reads a consistent state of the table while the
+        # records are changed (SQLite's WAL mode).
+        connection = sqlite3.connect(self.path)
+        try:
+            yield from _fetch_rows(connection.execute(f"SELECT {columns} FROM records"))
+        finally:
+            connection.close()
+
+    def __len__(self):
+        with self._lock:
+            cursor = self._connection.execute("SELECT COUNT(*) FROM records")
+            (count,) = cursor.fetchone()
+        return count
+
+    def copy(self) -> "SqliteSnapshot":
+        """Return a read-only view of the records as they are now.
+
+        The view keeps a read transaction open, so making it does not copy any
+        records; the records are read from the database when they are used.
+
+        >>> from tempfile import TemporaryDirectory
+        >>> with TemporaryDirectory() as directory:
+        ...     with SqliteRecords(Path(directory) / "records.db") as records:
+        ...         records["obj1"] = {"field1": 1}
+        ...         with records.copy() as snapshot:
+        ...             records["obj1"] = {"field1": 2}
+        ...             records["obj2"] = {"field1": 3}
+        ...             dict(snapshot.items()), len(snapshot)
+        ...         dict(records.items()), records.stats
+        ({'obj1': {'field1': 1}}, 1)
+        ({'obj1': {'field1': 2}, 'obj2': {'field1': 3}}, CacheStats(hits=0, misses=0))
+        """
+        return SqliteSnapshot(self.path)
+
+    def __repr__(self):
+        return f"SqliteRecords({str(self.path)!r})"
+
+    def _cache_record(self, obj_id, record: dict[str, Any]):
+        self._cache[obj_id] = record
+        self._cache.move_to_end(obj_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SqliteSnapshot(Mapping):
+    """The records of a `SqliteRecords` store as they were when it was created."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        # The read transaction starts with the first query.
+        self._connection.execute("BEGIN")
+        self._connection.execute("SELECT 1 FROM records LIMIT 1").fetchone()
+
+    def __getitem__(self, obj_id) -> dict[str, Any]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT record FROM records WHERE obj_id = ?", (_dumps(obj_id),)
+            ).fetchone()
+        if row is None:
+            raise KeyError(obj_id)
+        return pickle.loads(row[0])
+
+    def __iter__(self) -> Iterator:
+        for (key,) in self._select("obj_id"):
+            yield pickle.loads(key)
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM records"
+            ).fetchone()
+        return count
+
+    def items(self) -> ItemsView:
+        return _SqliteItemsView(self)
+
+    def values(self) -> ValuesView:
+        return _SqliteValuesView(self)
+
+    def _select(self, columns: str) -> Iterator[tuple]:
+        with self._lock:
+            cursor = self._connection.execute(f"SELECT {columns} FROM records")
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(_FETCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+    def __repr__(self):
+        return f"SqliteSnapshot({str(self.path)!r})"
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
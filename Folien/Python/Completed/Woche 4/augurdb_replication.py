@@ -0,0 +1,398 @@
+# %%
+import hmac
+import os
+import pickle
+import socket
+import struct
+import threading
+from itertools import count, islice
+from multiprocessing import current_process
+from typing import Any
+
+from augurdb_changes import Subscription, SubscriptionClosed
+from augurdb_database import AugurDatabase
+
+# %%
+_MESSAGE_SIZE = struct.Struct("<Q")
+_ACKNOWLEDGEMENT = struct.Struct("<Q")
+_CHALLENGE_SIZE = 32
+_RECORDS_CHUNK_SIZE = 10_000
+
+
+class ReplicationError(RuntimeError):
+    pass
+
+
+def _send_message(connection: socket.socket, message):
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    connection.sendall(_MESSAGE_SIZE.pack(len(payload)) + payload)
+
+
+def _receive_message(stream) -> Any:
+    header = stream.read(_MESSAGE_SIZE.size)
+    if len(header) < _MESSAGE_SIZE.size:
+        raise ConnectionError("The connection was closed.")
+    (size,) = _MESSAGE_SIZE.unpack(header)
+    payload = stream.read(size)
+    if len(payload) < size:
+        raise ConnectionError("The connection was closed.")
+    return pickle.loads(payload)
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("The connection was closed.")
+        data += chunk
+    return bytes(data)
+
+
+def _authenticate(connection: socket.socket, authkey: bytes, role: bytes):
+    """Check that the peer knows `authkey` and prove that we know it.
+
+    Both sides send a random challenge and answer the challenge of the other side
+    with an HMAC of their role and the challenge; including the role prevents a
+    peer from passing our own answer back to us."""
+    challenge = os.urandom(_CHALLENGE_SIZE)
+    connection.sendall(challenge)
+    peer_challenge = _receive_exactly(connection, _CHALLENGE_SIZE)
+    connection.sendall(hmac.digest(authkey, role + peer_challenge, "sha256"))
+    peer_role = b"replica" if role == b"primary" else b"primary"
+    expected = hmac.digest(authkey, peer_role + challenge, "sha256")
+    if not hmac.compare_digest(_receive_exactly(connection, len(expected)), expected):
+        raise ReplicationError("The peer does not know the authkey.")
+
+
+class ReplicationServer:
+    """Ship the commits of a primary database to replicas over TCP.
+
+    Replicas have to know `authkey`; by default, it is the authkey of the current
+    process, which processes started by `multiprocessing` inherit. Each replica
+    first receives the records in chunks, then the change set of every following
+    commit, in order. Every message contains the current LSN of the primary; if
+    there are no commits, a heartbeat is sent every `heartbeat_interval` seconds.
+
+    Replicas acknowledge the LSNs they have applied as 8-byte integers, the server
+    never unpickles data it receives. `lags` contains the number of commits each
+    replica is behind. A replica that falls behind by more than `maxsize` commits
+    or stops reading for `timeout` seconds is disconnected.
+
+    The records of the primary may be in any record store, e.g., `SqliteRecords`:
+
+    >>> from pathlib import Path
+    >>> from tempfile import TemporaryDirectory
+    >>> from augurdb_records import SqliteRecords
+    >>> with TemporaryDirectory() as directory:
+    ...     records = SqliteRecords(Path(directory) / "records.db")
+    ...     db = AugurDatabase(records=records)
+    ...     with db.begin() as transaction:
+    ...         transaction.store_field("obj1", "field1", 1)
+    ...     with ReplicationServer(db, authkey=b"secret") as server:
+    ...         with Replica(server.address, authkey=b"secret") as replica:
+    ...             with db.begin() as transaction:
+    ...                 transaction.store_field("obj2", "field1", 2)
+    ...             replica.wait_for(db.lsn, timeout=10), replica.database.records
+    ...     records.close()
+    (True, {'obj1': {'field1': 1}, 'obj2': {'field1': 2}})
+
+    Commits go on while a replica stalls; it is disconnected after `timeout`:
+
+    >>> db = AugurDatabase()
+    >>> server = ReplicationServer(db, authkey=b"secret", maxsize=1, timeout=0.1)
+    >>> replica = Replica(server.address, authkey=b"secret")
+    >>> # The replica cannot apply commits while its subscription is full.
+    >>> stalled = replica.database.subscribe(maxsize=1, timeout=None)
+    >>> for value in range(100):
+    ...     with db.begin() as transaction:
+    ...         transaction.store_field("obj1", "field1", str(value) * 100_000)
+    >>> server.wait_for_replicas(db.lsn, timeout=10), server.lags
+    (True, [])
+    >>> stalled.close()
+    >>> replica.wait_for(db.lsn, timeout=10), replica.is_connected, replica.lag > 0
+    (False, False, True)
+    >>> server.close()
+    """
+
+    def __init__(
+        self,
+        database: AugurDatabase,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        authkey: bytes | None = None,
+        maxsize: int = 10_000,
+        timeout: float = 10.0,
+        heartbeat_interval: float = 1.0,
+    ):
+        self.database = database
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.heartbeat_interval = heartbeat_interval
+        self._authkey = current_process().authkey if authkey is None else authkey
+        self._server = socket.create_server((host, port))
+        self.address: tuple[str, int] = self._server.getsockname()[:2]
+        self._acknowledged_lsns: dict[int, int] = {}
+        self._subscriptions: dict[int, Subscription] = {}
+        self._connection_ids = count()
+        self._condition = threading.Condition()
+        threading.Thread(target=self._accept_connections, daemon=True).start()
+
+    @property
+    def lags(self) -> list[int]:
+        with self._condition:
+            return [self.database.lsn - lsn for lsn in self._acknowledged_lsns.values()]
+
+    def wait_for_replicas(self, lsn: int, timeout: float | None = None) -> bool:
+        """Wait until all connected replicas have applied the commit `lsn`."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: all(
+                    acknowledged >= lsn
+                    for acknowledged in self._acknowledged_lsns.values()
+                ),
+                timeout,
+            )
+
+    def _accept_connections(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._serve_replica, args=(connection,), daemon=True
+            ).start()
+
+    def _serve_replica(self, connection: socket.socket):
+        # Sending to a replica that does not read fails after `timeout`.
+        connection.settimeout(self.timeout)
+        with connection:
+            try:
+                _authenticate(connection, self._authkey, b"primary")
+            except (OSError, ReplicationError):
+                return
+            connection_id = next(self._connection_ids)
+            with self.database._lock:
+                lsn = self.database.lsn
+                records = self.database.records
+                # Copies of dicts and `CompactRecords` are cheap and consistent;
+                # the copy of `SqliteRecords` is a read-only view. Other stores
+                # are read while commits go on; the change sets after `lsn`
+                # overwrite their values again.
+                if hasattr(records, "copy"):
+                    records = records.copy()
+                subscription = self.database.subscribe(self.maxsize, self.timeout)
+            with self._condition:
+                self._acknowledged_lsns[connection_id] = 0
+                self._subscriptions[connection_id] = subscription
+            threading.Thread(
+                target=self._receive_acknowledgements,
+                args=(connection, connection_id),
+                daemon=True,
+            ).start()
+            try:
+                items = iter(records.items())
+                while chunk := list(islice(items, _RECORDS_CHUNK_SIZE)):
+                    _send_message(connection, (self.database.lsn, "records", chunk))
+                _send_message(connection, (self.database.lsn, "snapshot", lsn))
+                while True:
+                    try:
+                        change_set = subscription.get(self.heartbeat_interval)
+                    except TimeoutError:
+                        _send_message(
+                            connection, (self.database.lsn, "heartbeat", None)
+                        )
+                    else:
+                        _send_message(
+                            connection, (self.database.lsn, "changes", change_set)
+                        )
+            except (OSError, SubscriptionClosed):
+                pass
+            finally:
+                subscription.close()
+                with self._condition:
+                    self._acknowledged_lsns.pop(connection_id, None)
+                    self._subscriptions.pop(connection_id, None)
+                    self._condition.notify_all()
+
+    def _receive_acknowledgements(self, connection: socket.socket, connection_id: int):
+        received = bytearray()
+        try:
+            while data := self._receive_some(connection):
+                received += data
+                while len(received) >= _ACKNOWLEDGEMENT.size:
+                    (lsn,) = _ACKNOWLEDGEMENT.unpack_from(received)
+                    del received[: _ACKNOWLEDGEMENT.size]
+                    with self._condition:
+                        if connection_id in self._acknowledged_lsns:
+                            self._acknowledged_lsns[connection_id] = lsn
+                            self._condition.notify_all()
+        except OSError:
+            pass
+        with self._condition:
+            subscription = self._subscriptions.get(connection_id)
+        if subscription is not None:
+            subscription.close()
+
+    @staticmethod
+    def _receive_some(connection: socket.socket) -> bytes:
+        """Return the next received bytes; a replica may be silent for long."""
+        while True:
+            try:
+                return connection.recv(4096)
+            except TimeoutError:
+                continue
+
+    def close(self):
+        self._server.close()
+        with self._condition:
+            subscriptions = list(self._subscriptions.values())
+        for subscription in subscriptions:
+            subscription.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Replica:
+    """A read-only copy of a database that follows a `ReplicationServer`.
+
+    The commits of the primary are applied to `database` in order. `primary_lsn`
+    is the latest LSN of the primary the replica has heard of, and `lag` the
+    number of commits the replica is behind it.
+    """
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        authkey: bytes | None = None,
+        timeout: float = 10.0,
+    ):
+        self.database = AugurDatabase()
+        self.primary_lsn = 0
+        self.is_connected = True
+        self.error: Exception | None = None
+        self._condition = threading.Condition()
+        self._connection = socket.create_connection(address, timeout)
+        try:
+            _authenticate(
+                self._connection,
+                current_process().authkey if authkey is None else authkey,
+                b"replica",
+            )
+        except BaseException:
+            self._connection.close()
+            raise
+        self._connection.settimeout(None)
+        threading.Thread(target=self._receive_commits, daemon=True).start()
+
+    @property
+    def lag(self) -> int:
+        return self.primary_lsn - self.database.lsn
+
+    def wait_for(self, lsn: int, timeout: float | None = None) -> bool:
+        """Wait until the commit `lsn` of the primary has been applied."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self.database.lsn >= lsn or not self.is_connected, timeout
+            ) and (self.database.lsn >= lsn)
+
+    def _receive_commits(self):
+        try:
+            with self._connection.makefile("rb") as stream:
+                while True:
+                    primary_lsn, kind, payload = _receive_message(stream)
+                    with self._condition:
+                        self.primary_lsn = max(self.primary_lsn, primary_lsn)
+                    self._apply(kind, payload)
+                    self._connection.sendall(_ACKNOWLEDGEMENT.pack(self.database.lsn))
+        except (OSError, ValueError, ReplicationError) as error:
+            self.error = error
+        finally:
+            with self._condition:
+                self.is_connected = False
+                self._condition.notify_all()
+
+    def _apply(self, kind: str, payload):
+        if kind == "records":
+            with self.database._lock:
+                self.database.records.update(payload)
+        elif kind == "snapshot":
+            with self.database._lock:
+                self.database.lsn = payload
+        elif kind == "changes":
+            if payload.lsn != self.database.lsn + 1:
+                raise ReplicationError(
+                    f"Expected commit {self.database.lsn + 1}, "
+                    f"received {payload.lsn}."
+                )
+            self.database._commit(payload.changes)
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def serve_replica(address: tuple[str, int], connection):
+    """Run a replica of the primary at `address` in the current process.
+
+    Requests are read from `connection`, e.g., a `multiprocessing` pipe, until
+    it receives `None`:
+
+    - `("wait", lsn)`: answer whether the commit `lsn` was applied within 10 s,
+    - `("read", obj_id)`: answer the record of `obj_id`, or `None`,
+    - `("lag",)`: answer the lag of the replica.
+
+    >>> import multiprocessing
+    >>> db = AugurDatabase()
+    >>> db.start_transaction()
+    >>> db.store_field("obj1", "field1", 1)
+    >>> db.commit_transaction()
+    >>> server = ReplicationServer(db)
+    >>> context = multiprocessing.get_context("spawn")
+    >>> pipes = [context.Pipe() for _ in range(2)]
+    >>> processes = [
+    ...     context.Process(target=serve_replica, args=(server.address, child))
+    ...     for _, child in pipes
+    ... ]
+    >>> for process in processes:
+    ...     process.start()
+    >>> for value in range(2, 5):
+    ...     with db.begin() as transaction:
+    ...         transaction.store_field("obj2", "field1", value)
+    >>> def request(*message):
+    ...     for parent, _ in pipes:
+    ...         parent.send(message)
+    ...     return [parent.recv() for parent, _ in pipes]
+    >>> request("wait", db.lsn)
+    [True, True]
+    >>> request("read", "obj2")
+    [{'field1': 4}, {'field1': 4}]
+    >>> request("lag",)
+    [0, 0]
+    >>> server.wait_for_replicas(db.lsn, timeout=10), server.lags
+    (True, [0, 0])
+    >>> for (parent, _), process in zip(pipes, processes):
+    ...     parent.send(None)
+    ...     process.join()
+    >>> server.close()
+    """
+    with Replica(address) as replica:
+        while (message := connection.recv()) is not None:
+            if message[0] == "wait":
+                connection.send(replica.wait_for(message[1], timeout=10))
+            elif message[0] == "read":
+                connection.send(replica.database.records.get(message[1]))
+            elif message[0] == "lag":
+                connection.send(replica.lag)
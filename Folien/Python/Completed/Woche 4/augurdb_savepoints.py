@@ -0,0 +1,85 @@
+# %%
+from typing import Any
+
+from augurdb import TransactionError
+from augurdb_records import ColumnBatch, FieldValues, Records, merge_field_values
+
+# %%
+_MISSING = object()
+
+
+class Savepoints:
+    """The savepoints of a transaction.
+
+    Each savepoint is a layer of undo entries for the changes made after it was
+    created. Creating and releasing a savepoint is cheap; rolling back to a
+    savepoint only undoes the changes made since then.
+
+    >>> changes, savepoints = {}, Savepoints()
+    >>> savepoints.store(changes, "obj1", "field1", 1)
+    >>> savepoint = savepoints.create()
+    >>> savepoints.store(changes, "obj1", "field1", 2)
+    >>> savepoints.store(changes, "obj2", "field1", 3)
+    >>> changes
+    {'obj1': {'field1': 2}, 'obj2': {'field1': 3}}
+    >>> savepoints.rollback_to(changes, savepoint)
+    >>> changes
+    {'obj1': {'field1': 1}}
+    """
+
+    def __init__(self):
+        self._layers: list[list[tuple[Any, Any, Any]]] = []
+
+    def create(self) -> int:
+        self._layers.append([])
+        return len(self._layers)
+
+    def rollback_to(self, changes: Records, savepoint: int):
+        """Undo the changes made since `savepoint`; the savepoint stays active."""
+        self._check(savepoint)
+        while len(self._layers) >= savepoint:
+            for obj_id, name, old_value in reversed(self._layers.pop()):
+                if name is _MISSING:
+                    del changes[obj_id]
+                elif old_value is _MISSING:
+                    del changes[obj_id][name]
+                else:
+                    changes[obj_id][name] = old_value
+        self._layers.append([])
+
+    def release(self, savepoint: int):
+        """Remove `savepoint` and the savepoints after it, keeping the changes."""
+        self._check(savepoint)
+        released = [entry for layer in self._layers[savepoint - 1 :] for entry in layer]
+        del self._layers[savepoint - 1 :]
+        if self._layers:
+            self._layers[-1].extend(released)
+
+    def clear(self):
+        self._layers.clear()
+
+    def store(self, changes: Records, obj_id, name, value):
+        """Store a field value in `changes`, remembering how to undo it."""
+        record = changes.get(obj_id)
+        if record is None:
+            record = changes[obj_id] = {}
+            if self._layers:
+                self._layers[-1].append((obj_id, _MISSING, _MISSING))
+        elif self._layers:
+            self._layers[-1].append((obj_id, name, record.get(name, _MISSING)))
+        record[name] = value
+
+    def store_many(self, changes: Records, field_values: FieldValues):
+        if not self._layers:
+            merge_field_values(changes, field_values)
+        elif isinstance(field_values, ColumnBatch):
+            for name, values in field_values.columns.items():
+                for obj_id, value in zip(field_values.obj_ids, values):
+                    self.store(changes, obj_id, name, value)
+        else:
+            for obj_id, name, value in field_values:
+                self.store(changes, obj_id, name, value)
+
+    def _check(self, savepoint: int):
+        if not 1 <= savepoint <= len(self._layers):
+            raise TransactionError(f"Savepoint {savepoint} does not exist.")
@@ -0,0 +1,201 @@
+"""Generators for large worlds.
+
+The functions in this module produce location descriptions in the format that
+`GameFactory.create_world()` expects. The descriptions are generated lazily, one
+location at a time, and the same seed always produces the same world.
+
+>>> from itertools import islice
+>>> list(islice(grid_locations(2, 2, seed=1), 2))
+[{'name': 'Room 0,0', 'description': ..., 'connections': {'east': 'Room 1,0',
+                                                          'south': 'Room 0,1'}},
+ {'name': 'Room 1,0', 'description': ..., 'connections': {'west': 'Room 0,0',
+                                                          'south': 'Room 1,1'}}]
+"""
+
+from math import gcd
+from random import Random
+from typing import Any, Iterator
+
+LocationDescription = dict[str, Any]
+
+ROOM_DESCRIPTIONS = (
+    "A small room",
+    "A large room",
+    "You are in a dimly lit room with a high ceiling",
+    "You enter a dark and gloomy corridor",
+    "You find yourself in a brightly lit corridor",
+    "A damp cave with water dripping from the ceiling",
+    "A narrow passage with rough stone walls",
+)
+
+
+def grid_location_name(x: int, y: int) -> str:
+    return f"Room {x},{y}"
+
+
+def graph_location_name(index: int) -> str:
+    return f"Room {index}"
+
+
+def grid_locations(
+    width: int, height: int, seed: int | None = None
+) -> Iterator[LocationDescription]:
+    """Generate a rectangular grid in which every room is connected to its
+    neighbors.
+
+    >>> [len(loc["connections"]) for loc in grid_locations(3, 2)]
+    [2, 3, 2, 2, 3, 2]
+    """
+    rng = Random(seed)
+    for y in range(height):
+        for x in range(width):
+            connections = {}
+            if y > 0:
+                connections["north"] = grid_location_name(x, y - 1)
+            if x > 0:
+                connections["west"] = grid_location_name(x - 1, y)
+            if x < width - 1:
+                connections["east"] = grid_location_name(x + 1, y)
+            if y < height - 1:
+                connections["south"] = grid_location_name(x, y + 1)
+            yield _grid_location(x, y, connections, rng)
+
+
+def cave_locations(
+    width: int, height: int, seed: int | None = None, loop_probability: float = 0.0
+) -> Iterator[LocationDescription]:
+    """Generate a maze-like cave system on a `width` x `height` grid.
+
+    The cave is generated row by row with Eller's algorithm, so only a single row
+    has to be kept in memory. With `loop_probability == 0` the cave is a perfect
+    maze, i.e., there is exactly one path between any two rooms; larger values
+    add passages that create loops.
+
+    >>> cave = list(cave_locations(4, 3, seed=42))
+    >>> len(cave)
+    12
+    >>> sum(len(loc["connections"]) for loc in cave) // 2
+    11
+    """
+    rng = Random(seed)
+    next_set_id = 0
+    row_sets: list[int | None] = [None] * width
+    north_links = [False] * width
+    for y in range(height):
+        is_last_row = y == height - 1
+        for x in range(width):
+            if row_sets[x] is None:
+                row_sets[x] = next_set_id
+                next_set_id += 1
+        members: dict[int, list[int]] = {}
+        for x, set_id in enumerate(row_sets):
+            members.setdefault(set_id, []).append(x)
+
+        east_links = [False] * width
+        for x in range(width - 1):
+            left, right = row_sets[x], row_sets[x + 1]
+            if left != right:
+                if is_last_row or rng.random() < 0.5:
+                    east_links[x] = True
+                    _merge_sets(row_sets, members, left, right)
+            elif rng.random() < loop_probability:
+                east_links[x] = True
+
+        south_links = [False] * width
+        if not is_last_row:
+            for columns in members.values():
+                for x in columns:
+                    south_links[x] = rng.random() < 0.5
+                if not any(south_links[x] for x in columns):
+                    south_links[rng.choice(columns)] = True
+
+        for x in range(width):
+            connections = {}
+            if north_links[x]:
+                connections["north"] = grid_location_name(x, y - 1)
+            if x > 0 and east_links[x - 1]:
+                connections["west"] = grid_location_name(x - 1, y)
+            if east_links[x]:
+                connections["east"] = grid_location_name(x + 1, y)
+            if south_links[x]:
+                connections["south"] = grid_location_name(x, y + 1)
+            yield _grid_location(x, y, connections, rng)
+
+        row_sets = [
+            set_id if south_links[x] else None for x, set_id in enumerate(row_sets)
+        ]
+        north_links = south_links
+
+
+def random_graph_locations(
+    num_locations: int, num_passages: int = 2, seed: int | None = None
+) -> Iterator[LocationDescription]:
+    """Generate a random, connected graph of locations.
+
+    All locations are connected in a ring by `east` and `west` connections. In
+    addition, each location is connected to up to `num_passages` random partners.
+    The partners are computed from random permutations of the locations, so that
+    the connections of each location can be generated independently.
+
+    >>> graph = list(random_graph_locations(5, num_passages=1, seed=3))
+    >>> [loc["name"] for loc in graph]
+    ['Room 0', 'Room 1', 'Room 2', 'Room 3', 'Room 4']
+    >>> graph[0]["connections"]["east"], graph[0]["connections"]["west"]
+    ('Room 1', 'Room 4')
+    """
+    rng = Random(seed)
+    permutations = [
+        _random_permutation(num_locations, rng) for _ in range(num_passages)
+    ]
+    for index in range(num_locations):
+        connections = {}
+        if num_locations > 1:
+            connections["east"] = graph_location_name((index + 1) % num_locations)
+            connections["west"] = graph_location_name((index - 1) % num_locations)
+        for passage, (permute, invert) in enumerate(permutations, 1):
+            partner_position = permute(index) ^ 1
+            if partner_position < num_locations:
+                connections[f"passage {passage}"] = graph_location_name(
+                    invert(partner_position)
+                )
+        yield {
+            "name": graph_location_name(index),
+            "description": rng.choice(ROOM_DESCRIPTIONS),
+            "connections": connections,
+        }
+
+
+def _grid_location(
+    x: int, y: int, connections: dict[str, str], rng: Random
+) -> LocationDescription:
+    return {
+        "name": grid_location_name(x, y),
+        "description": rng.choice(ROOM_DESCRIPTIONS),
+        "connections": connections,
+    }
+
+
+def _merge_sets(
+    row_sets: list[int | None], members: dict[int, list[int]], left: int, right: int
+):
+    """Merge the smaller of the two sets into the larger one."""
+    if len(members[left]) < len(members[right]):
+        left, right = right, left
+    for x in members[right]:
+        row_sets[x] = left
+    members[left].extend(members.pop(right))
+
+
+def _random_permutation(n: int, rng: Random):
+    """Return a random affine permutation of `range(n)` and its inverse."""
+    if n <= 1:
+        return (lambda i: i), (lambda i: i)
+    factor = rng.randrange(1, n)
+    while gcd(factor, n) != 1:
+        factor = rng.randrange(1, n)
+    offset = rng.randrange(n)
+    inverse_factor = pow(factor, -1, n)
+    return (
+        lambda i: (factor * i + offset) % n,
+        lambda j: ((j - offset) * inverse_factor) % n,
+    )
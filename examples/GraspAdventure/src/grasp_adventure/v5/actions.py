@@ -5,6 +5,7 @@ from .base_classes import Action, GameObject
 from .location import Location
 
 if TYPE_CHECKING:
+    from .game_state import GameState
     from .player import Player
 
 
@@ -20,6 +21,9 @@ class MoveAction(Action):
     def execute(self, instigator: "Player") -> None:
         instigator.location = self.target
 
+    def apply_to(self, state: "GameState", player_name: str) -> None:
+        state.move(player_name, self.target)
+
 
 @dataclass
 class SkipTurnAction(Action):
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import Hashable, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from .game_state import GameState
     from .player import Player
 
 
@@ -13,6 +14,22 @@ class Action(ABC):
     @abstractmethod
     def execute(self, instigator: "Player") -> None: ...
 
+    @property
+    def exclusive_resource(self) -> Hashable | None:
+        """A resource that only one player may use per round, if any."""
+        return None
+
+    def apply_to(self, state: "GameState", player_name: str) -> None:
+        """Perform the action in a simulated game state.
+
+        Actions that don't change the state of the game don't need to override this
+        method."""
+
+
+class TurnScheduler(ABC):
+    @abstractmethod
+    def take_turns(self, players: list["Player"]) -> None: ...
+
 
 class GameObject(ABC):
     @abstractmethod
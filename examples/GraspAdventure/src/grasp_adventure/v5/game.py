@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from io import StringIO
 
+from .base_classes import TurnScheduler
 from .player import Player
+from .scheduler import SequentialScheduler
 from .world import World
 
 
@@ -9,6 +11,7 @@ from .world import World
 class Game:
     players: list[Player]
     world: World
+    scheduler: TurnScheduler = field(default_factory=SequentialScheduler)
 
     @property
     def description(self):
@@ -19,11 +22,13 @@ class Game:
         return io.getvalue()
 
     def play_round(self):
-        for player in self.players:
-            player.take_turn()
+        self.take_turns()
         self.print_round_header()
         print(self.description)
 
+    def take_turns(self):
+        self.scheduler.take_turns(self.players)
+
     @staticmethod
     def print_round_header():
         header = "Playing a round."
@@ -10,7 +10,10 @@ from .world import World
 
 class GameFactory:
     def __init__(
-        self, object_descriptions: dict[str, Any] | None = None, object_classes=None
+        self,
+        object_descriptions: dict[str, Any] | None = None,
+        object_classes=None,
+        world: World | None = None,
     ):
         self.object_descriptions: dict[str, Any] = (
             {} if object_descriptions is None else object_descriptions
@@ -19,7 +22,7 @@ class GameFactory:
             {} if object_classes is None else object_classes
         )
         self.objects = {}
-        self.world: World | None = None
+        self.world: World | None = world
         self.players = {}
 
     def create_game(
@@ -51,12 +54,23 @@ class GameFactory:
         self,
         location_descriptions: LocationDescriptions,
     ) -> World:
-        """Create a World from a description of its locations."""
+        """Create a World from a description of its locations.
+
+        The descriptions are consumed in a single pass, therefore they can be
+        produced lazily, e.g., by a generator. The first location becomes the
+        initial location of the world.
+
+        >>> descriptions = ({"name": f"Room {i}"} for i in range(3))
+        >>> GameFactory().create_world(descriptions).initial_location_name
+        'Room 0'
+        """
         if self.world is None:
             locations = GameFactory._create_locations(location_descriptions)
+            if not locations:
+                raise ValueError("Cannot create a world without locations.")
             self.world = World(
                 locations=locations,
-                initial_location_name=location_descriptions[0]["name"],
+                initial_location_name=next(iter(locations)),
             )
             return self.world
         else:
@@ -83,25 +97,43 @@ class GameFactory:
     def _create_locations(
         location_descriptions: LocationDescriptions,
     ) -> dict[str, Location]:
-        """Create a World from a description of its locations."""
-        locations = {
-            data["name"]: Location.from_description(data)
-            for data in location_descriptions
-        }
-        GameFactory._build_connections_for_all_locations(
-            locations, location_descriptions
-        )
-        return locations
+        """Create a World from a description of its locations.
 
-    @staticmethod
-    def _build_connections_for_all_locations(
-        locations: dict[str, Location], location_descriptions: LocationDescriptions
-    ):
-        for location_description in location_descriptions:
-            connections = {
-                direction: locations[name]
-                for direction, name in location_description.get(
-                    "connections", {}
-                ).items()
+        Connections to locations that have not been described yet refer to
+        placeholders that are completed by the later descriptions, therefore no
+        description has to be kept after it has been read.
+
+        >>> GameFactory._create_locations(
+        ...     [{"name": "Hall", "connections": {"north": "Attic"}}, {"name": "Cellar"}]
+        ... )
+        Traceback (most recent call last):
+        ...
+        ValueError: Locations without description: Attic.
+        """
+        locations: dict[str, Location] = {}
+        placeholders: dict[str, Location] = {}
+
+        def location_named(name: str) -> Location:
+            location = locations.get(name)
+            if location is None:
+                location = placeholders.get(name)
+                if location is None:
+                    location = placeholders[name] = Location(name)
+            return location
+
+        for data in location_descriptions:
+            location = placeholders.pop(data["name"], None)
+            if location is None:
+                location = Location.from_description(data)
+            else:
+                location.description = data.get("description", "")
+            locations[location.name] = location
+            location.connections = {
+                direction: location_named(name)
+                for direction, name in data.get("connections", {}).items()
             }
-            locations[location_description["name"]].connections = connections
+        if placeholders:
+            raise ValueError(
+                f"Locations without description: {', '.join(placeholders)}."
+            )
+        return locations
@@ -0,0 +1,222 @@
+"""Hosting many games that share their worlds.
+
+Games created from the same `WorldTemplate` share a single `World` per process;
+only the state of the players, i.e., their names, positions and strategies, and
+the objects of each game are stored for each game. Rounds are played in shards of
+games, either in the current thread or on an executor. Since shards only contain
+the state of the games and the (small) template, they can be sent to a process
+pool as well as to a thread pool.
+"""
+
+from collections import ChainMap, OrderedDict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Callable, Iterable
+from uuid import uuid4
+
+from .base_classes import Action, GameObject
+from .game import Game
+from .game_factory import GameFactory
+from .game_state import GameState
+from .location import LocationDescription, LocationDescriptions
+from .pawn import Pawn
+from .player import Player, first_action_strategy
+from .world import World
+
+MAX_CACHED_WORLDS = 16
+
+# The worlds of the most recently used templates, by template id.
+_worlds: OrderedDict[str, World] = OrderedDict()
+_worlds_lock = Lock()
+
+# The descriptions of a template are read again whenever its world is created, so
+# they must not be a one-shot iterable such as a generator.
+TemplateDescriptions = (
+    Sequence[LocationDescription] | Callable[[], LocationDescriptions]
+)
+
+
+@dataclass(frozen=True)
+class WorldTemplate:
+    """A world that is created once per process and shared between games.
+
+    `location_descriptions` is either a sequence of descriptions or a function that
+    returns the descriptions, e.g., a `functools.partial` of a generator from
+    `grasp_adventure.data`. The world is created again in every process and after
+    it has been evicted, so one-shot iterables such as generators are rejected.
+    Use the function form with process pools: the template is sent with every
+    shard, and a function is much smaller than the list of descriptions.
+
+    Each template gets a unique `template_id` that is kept when the template is
+    sent to another process; templates with the same `key` therefore never share
+    their worlds. Each process keeps the worlds of the `MAX_CACHED_WORLDS` most
+    recently used templates.
+    """
+
+    key: str
+    location_descriptions: TemplateDescriptions = field(repr=False)
+    template_id: str = field(default_factory=lambda: uuid4().hex, repr=False)
+
+    def __post_init__(self):
+        if not callable(self.location_descriptions) and not isinstance(
+            self.location_descriptions, Sequence
+        ):
+            raise TypeError(
+                "The location descriptions of a template must be a sequence or a "
+                "function returning the descriptions."
+            )
+
+    @property
+    def world(self) -> World:
+        with _worlds_lock:
+            world = _worlds.get(self.template_id)
+            if world is None:
+                world = GameFactory().create_world(self._descriptions())
+                _worlds[self.template_id] = world
+                while len(_worlds) > MAX_CACHED_WORLDS:
+                    _worlds.popitem(last=False)
+            else:
+                _worlds.move_to_end(self.template_id)
+        return world
+
+    def _descriptions(self) -> LocationDescriptions:
+        if callable(self.location_descriptions):
+            return self.location_descriptions()
+        return self.location_descriptions
+
+
+@dataclass
+class PlayerState:
+    name: str
+    location_name: str
+    select_action: Callable[[Player], Action] = first_action_strategy
+
+
+@dataclass
+class HostedGame:
+    template: WorldTemplate
+    players: list[PlayerState]
+    objects: dict[str, GameObject] = field(default_factory=dict)
+
+    def to_game(self) -> Game:
+        """Create a game in the shared world for the current player states."""
+        world = self.template.world
+        players = [
+            Player(
+                name=state.name,
+                pawn=Pawn(location=world[state.location_name]),
+                select_action=state.select_action,
+            )
+            for state in self.players
+        ]
+        return Game(players=players, world=world)
+
+    def to_state(self) -> GameState:
+        """Create a game state, e.g., for simulations, in the shared world."""
+        world = self.template.world
+        return GameState(
+            world=world,
+            positions=ChainMap(
+                {state.name: world[state.location_name] for state in self.players}
+            ),
+            objects=ChainMap(dict(self.objects)),
+        )
+
+    def update_locations(self, location_names: list[str]):
+        for state, location_name in zip(self.players, location_names):
+            state.location_name = location_name
+
+
+def play_shard(
+    template: WorldTemplate, shard: list[list[PlayerState]], rounds: int
+) -> list[list[str]]:
+    """Play `rounds` rounds of each game in `shard`.
+
+    Return the new location names of the players in each game."""
+    result = []
+    for player_states in shard:
+        game = HostedGame(template, player_states).to_game()
+        for _ in range(rounds):
+            game.take_turns()
+        result.append([player.location.name for player in game.players])
+    return result
+
+
+class GameHost:
+    """Create and run many games on a small number of shared worlds.
+
+    Player strategies are copied when games are played on a process pool;
+    strategies that keep state between turns therefore only keep it when the games
+    are played in the current process or on a thread pool.
+    """
+
+    def __init__(self, executor: Executor | None = None, games_per_shard: int = 100):
+        self.executor = executor
+        self.games_per_shard = games_per_shard
+        self.templates: dict[str, WorldTemplate] = {}
+        self.games: list[HostedGame] = []
+
+    def add_template(
+        self,
+        key: str,
+        location_descriptions: TemplateDescriptions,
+    ) -> WorldTemplate:
+        if key in self.templates:
+            raise ValueError(f"Template {key!r} already exists.")
+        template = WorldTemplate(key, location_descriptions)
+        self.templates[key] = template
+        return template
+
+    def create_game(
+        self,
+        template_key: str,
+        player_descriptions,
+        select_action: Callable[[Player], Action] = first_action_strategy,
+        objects: Mapping[str, GameObject] | None = None,
+    ) -> HostedGame:
+        """Create a game; each game has its own copy of `objects`."""
+        template = self.templates[template_key]
+        players = GameFactory(world=template.world).create_players(player_descriptions)
+        game = HostedGame(
+            template,
+            [
+                PlayerState(player.name, player.location.name, select_action)
+                for player in players
+            ],
+            {} if objects is None else dict(objects),
+        )
+        self.games.append(game)
+        return game
+
+    def play_rounds(self, rounds: int = 1):
+        shards = list(self._shards())
+        if self.executor is None:
+            results = [
+                play_shard(games[0].template, self._player_states(games), rounds)
+                for games in shards
+            ]
+        else:
+            futures = [
+                self.executor.submit(
+                    play_shard, games[0].template, self._player_states(games), rounds
+                )
+                for games in shards
+            ]
+            results = [future.result() for future in futures]
+        for games, shard_result in zip(shards, results):
+            for game, location_names in zip(games, shard_result):
+                game.update_locations(location_names)
+
+    def _shards(self) -> Iterable[list[HostedGame]]:
+        games_by_template: dict[str, list[HostedGame]] = {}
+        for game in self.games:
+            games_by_template.setdefault(game.template.key, []).append(game)
+        for games in games_by_template.values():
+            for start in range(0, len(games), self.games_per_shard):
+                yield games[start : start + self.games_per_shard]
+
+    @staticmethod
+    def _player_states(games: list[HostedGame]) -> list[list[PlayerState]]:
+        return [game.players for game in games]
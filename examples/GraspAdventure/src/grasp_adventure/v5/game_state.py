@@ -0,0 +1,74 @@
+from collections import ChainMap
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .base_classes import Action, GameObject
+from .location import Location
+from .world import World
+
+if TYPE_CHECKING:
+    from .game import Game
+
+MAX_FORK_DEPTH = 32
+
+
+@dataclass
+class GameState:
+    """The mutable part of a game, e.g., for simulating moves.
+
+    The world is shared between all game states and never modified. Pawn positions
+    and objects are stored in layered mappings: a fork only adds an empty layer on
+    top of its parent, changes are written into this layer, and the parent remains
+    unchanged. Objects are treated as immutable values; to change an object, replace
+    it with a modified copy.
+    """
+
+    world: World
+    positions: ChainMap[str, Location] = field(default_factory=ChainMap)
+    objects: ChainMap[str, GameObject] = field(default_factory=ChainMap)
+
+    @classmethod
+    def from_game(
+        cls, game: "Game", objects: dict[str, GameObject] | None = None
+    ) -> "GameState":
+        return cls(
+            world=game.world,
+            positions=ChainMap(
+                {player.name: player.location for player in game.players}
+            ),
+            objects=ChainMap({} if objects is None else dict(objects)),
+        )
+
+    def fork(self) -> "GameState":
+        """Return a new state that shares all unchanged data with this one."""
+        if len(self.positions.maps) > MAX_FORK_DEPTH:
+            return GameState(
+                self.world, ChainMap(dict(self.positions)), ChainMap(dict(self.objects))
+            )
+        return GameState(
+            self.world, self.positions.new_child(), self.objects.new_child()
+        )
+
+    @property
+    def player_names(self) -> list[str]:
+        return list(self.positions)
+
+    def location_of(self, player_name: str) -> Location:
+        return self.positions[player_name]
+
+    def move(self, player_name: str, location: Location) -> None:
+        self.positions[player_name] = location
+
+    def replace_object(self, object_name: str, new_object: GameObject) -> None:
+        self.objects[object_name] = new_object
+
+    def actions_for(self, player_name: str) -> list[Action]:
+        from .actions import SkipTurnAction
+
+        return [*self.location_of(player_name).move_actions, SkipTurnAction()]
+
+    def perform(self, player_name: str, action: Action) -> "GameState":
+        """Return a fork of this state in which the player has performed `action`."""
+        new_state = self.fork()
+        action.apply_to(new_state, player_name)
+        return new_state
@@ -1,10 +1,10 @@
 from dataclasses import dataclass, field
-from typing import Any, Mapping, Sequence
+from typing import Any, Iterable, Mapping
 
 from .base_classes import Action
 
 LocationDescription = Mapping[str, Any]
-LocationDescriptions = Sequence[LocationDescription]
+LocationDescriptions = Iterable[LocationDescription]
 
 
 @dataclass
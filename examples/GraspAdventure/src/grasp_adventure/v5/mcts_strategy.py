@@ -0,0 +1,297 @@
+"""Monte-Carlo tree search as strategy for players.
+
+`MctsStrategy` can be used as `select_action` for a `Player`. It simulates moves
+on forks of a `GameState`, so the world is never copied; searches in other
+processes use the world of a `WorldTemplate` that is created once per process.
+"""
+
+import math
+import time
+from collections import ChainMap
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from random import Random
+from typing import Callable, TYPE_CHECKING
+
+from .base_classes import Action, GameObject
+from .game_host import WorldTemplate
+from .game_state import GameState
+from .world import World
+
+if TYPE_CHECKING:
+    from .player import Player
+
+RewardFunction = Callable[[GameState, str], float]
+
+
+@dataclass(frozen=True)
+class GoalReward:
+    """Reward a player for being at the location named `location_name`."""
+
+    location_name: str
+
+    def __call__(self, state: GameState, player_name: str) -> float:
+        return float(state.location_of(player_name).name == self.location_name)
+
+
+@dataclass(frozen=True)
+class SearchSettings:
+    reward: RewardFunction
+    iterations: int | None = 1000
+    time_budget: float | None = None
+    rollout_depth: int = 10
+    discount: float = 0.9
+    exploration: float = 1.4
+
+    def __post_init__(self):
+        if self.iterations is None and self.time_budget is None:
+            raise ValueError("Either iterations or time_budget must be set.")
+
+
+@dataclass
+class SearchStats:
+    rollouts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.seconds if self.seconds > 0 else 0.0
+
+
+class _Node:
+    __slots__ = ("state", "actions", "children", "visits", "value")
+
+    def __init__(self, state: GameState, player_name: str):
+        self.state = state
+        self.actions = state.actions_for(player_name)
+        self.children: list["_Node | None"] = [None] * len(self.actions)
+        self.visits = 0
+        self.value = 0.0
+
+    @property
+    def is_fully_expanded(self) -> bool:
+        return None not in self.children
+
+    def child(self, index: int, player_name: str) -> "_Node":
+        child = self.children[index]
+        if child is None:
+            child = _Node(
+                self.state.perform(player_name, self.actions[index]), player_name
+            )
+            self.children[index] = child
+        return child
+
+    def best_child_index(self, exploration: float) -> int:
+        log_visits = math.log(self.visits)
+
+        def score(index: int) -> float:
+            child = self.children[index]
+            assert child is not None
+            return child.value / child.visits + exploration * math.sqrt(
+                log_visits / child.visits
+            )
+
+        return max(range(len(self.children)), key=score)
+
+    def most_visited_child_index(self) -> int:
+        return max(
+            range(len(self.children)),
+            key=lambda index: (
+                0 if self.children[index] is None else self.children[index].visits
+            ),
+        )
+
+
+def _run_search(
+    root: _Node, player_name: str, settings: SearchSettings, rng: Random
+) -> int:
+    """Grow the tree below `root` within the budget and return the rollout count."""
+    start_time = time.perf_counter()
+    rollouts = 0
+    while (settings.iterations is None or rollouts < settings.iterations) and (
+        settings.time_budget is None
+        or time.perf_counter() - start_time < settings.time_budget
+    ):
+        path = _select_and_expand(root, player_name, settings, rng)
+        value = _rollout(path[-1].state, player_name, len(path) - 1, settings, rng)
+        _backpropagate(path, value, player_name, settings)
+        rollouts += 1
+    return rollouts
+
+
+def _select_and_expand(
+    root: _Node, player_name: str, settings: SearchSettings, rng: Random
+) -> list[_Node]:
+    """Return the path from `root` to a newly expanded node.
+
+    The tree is never grown beyond the search horizon, `settings.rollout_depth`.
+    """
+    path = [root]
+    while (
+        path[-1].is_fully_expanded
+        and path[-1].visits > 0
+        and len(path) <= settings.rollout_depth
+    ):
+        node = path[-1]
+        path.append(
+            node.child(node.best_child_index(settings.exploration), player_name)
+        )
+    if not path[-1].is_fully_expanded and len(path) <= settings.rollout_depth:
+        node = path[-1]
+        unexpanded = [i for i, child in enumerate(node.children) if child is None]
+        path.append(node.child(rng.choice(unexpanded), player_name))
+    return path
+
+
+def _rollout(
+    state: GameState,
+    player_name: str,
+    depth: int,
+    settings: SearchSettings,
+    rng: Random,
+) -> float:
+    """Play random moves and return the discounted reward.
+
+    The rollout works on a single fork and moves the player in place; this is much
+    cheaper than forking the state for every step.
+    """
+    state = state.fork()
+    total = settings.reward(state, player_name)
+    weight = 1.0
+    for _ in range(depth, settings.rollout_depth):
+        weight *= settings.discount
+        rng.choice(state.actions_for(player_name)).apply_to(state, player_name)
+        total += weight * settings.reward(state, player_name)
+    return total
+
+
+def _backpropagate(
+    path: list[_Node], value: float, player_name: str, settings: SearchSettings
+) -> None:
+    """Add the discounted reward from each node on `path` onwards to its value."""
+    path[-1].visits += 1
+    path[-1].value += value
+    for node in reversed(path[:-1]):
+        value = settings.reward(node.state, player_name) + settings.discount * value
+        node.visits += 1
+        node.value += value
+
+
+def _world_of(world: World | WorldTemplate) -> World:
+    return world.world if isinstance(world, WorldTemplate) else world
+
+
+def _search_root_statistics(
+    world: World | WorldTemplate,
+    location_names: dict[str, str],
+    objects: dict[str, GameObject],
+    player_name: str,
+    settings: SearchSettings,
+    seed: int,
+) -> tuple[list[tuple[int, float]], int]:
+    """Run an independent search and return visits and value for each root action.
+
+    This function is run by the workers of an executor; everything it needs is
+    passed as (picklable) arguments. The state of the game is passed as location
+    names, so that only a template of the world has to be sent to other processes.
+    """
+    world = _world_of(world)
+    state = GameState(
+        world,
+        ChainMap({name: world[location] for name, location in location_names.items()}),
+        ChainMap(objects),
+    )
+    root = _Node(state, player_name)
+    rollouts = _run_search(root, player_name, settings, Random(seed))
+    statistics = [
+        (0, 0.0) if child is None else (child.visits, child.value)
+        for child in root.children
+    ]
+    return statistics, rollouts
+
+
+@dataclass
+class MctsStrategy:
+    """Select actions by Monte-Carlo tree search.
+
+    The search tree below the selected action is reused for the next turn. If an
+    `executor` is provided, `num_workers` independent searches are run in parallel
+    and their statistics for the possible actions are merged. Process pools need a
+    `WorldTemplate` as `world`: a `World` would be pickled for every search, and
+    large worlds are too deeply nested to be pickled at all.
+
+    The executor is not pickled with the strategy, so a strategy sent to another
+    process, e.g., by a `GameHost`, searches in that process.
+    """
+
+    world: World | WorldTemplate = field(repr=False)
+    settings: SearchSettings
+    seed: int | None = None
+    executor: Executor | None = None
+    num_workers: int = 1
+    stats: SearchStats = field(default_factory=SearchStats)
+    _root: _Node | None = field(default=None, init=False, repr=False)
+    _rng: Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._rng = Random(self.seed)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["executor"] = None
+        return state
+
+    def __call__(self, player: "Player") -> Action:
+        start_time = time.perf_counter()
+        root = self._root_for(player)
+        if self.executor is None:
+            rollouts = _run_search(root, player.name, self.settings, self._rng)
+        else:
+            rollouts = self._run_parallel_search(root, player.name)
+        self.stats.rollouts += rollouts
+        self.stats.seconds += time.perf_counter() - start_time
+
+        index = root.most_visited_child_index()
+        self._root = root.child(index, player.name)
+        return root.actions[index]
+
+    def _root_for(self, player: "Player") -> _Node:
+        if (
+            self._root is not None
+            and self._root.state.location_of(player.name) is player.location
+        ):
+            return self._root
+        state = GameState(
+            _world_of(self.world), ChainMap({player.name: player.location})
+        )
+        return _Node(state, player.name)
+
+    def _run_parallel_search(self, root: _Node, player_name: str) -> int:
+        assert self.executor is not None
+        location_names = {
+            name: location.name for name, location in root.state.positions.items()
+        }
+        objects = dict(root.state.objects)
+        futures = [
+            self.executor.submit(
+                _search_root_statistics,
+                self.world,
+                location_names,
+                objects,
+                player_name,
+                self.settings,
+                self._rng.getrandbits(64),
+            )
+            for _ in range(self.num_workers)
+        ]
+        total_rollouts = 0
+        for future in futures:
+            statistics, rollouts = future.result()
+            total_rollouts += rollouts
+            root.visits += rollouts
+            for index, (visits, value) in enumerate(statistics):
+                if visits > 0:
+                    child = root.child(index, player_name)
+                    child.visits += visits
+                    child.value += value
+        return total_rollouts
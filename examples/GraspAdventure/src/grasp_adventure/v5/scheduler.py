@@ -0,0 +1,120 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Callable, TYPE_CHECKING
+
+from .base_classes import Action, TurnScheduler
+
+if TYPE_CHECKING:
+    from .game_host import WorldTemplate
+    from .player import Player
+
+
+class SequentialScheduler(TurnScheduler):
+    """Let the players take their turns one after the other.
+
+    Each player sees the results of the actions of all players before them."""
+
+    def take_turns(self, players: list["Player"]) -> None:
+        for player in players:
+            player.take_turn()
+
+
+def select_action_index(player: "Player") -> int:
+    """Select an action for `player` and return its index in `player.actions`.
+
+    Returning an index instead of the action allows players to select their actions
+    in another process, where the action would refer to a copy of the world. The
+    strategy of the player therefore has to return one of `player.actions`."""
+    actions = player.actions
+    action = player.select_action(player)
+    try:
+        return actions.index(action)
+    except ValueError:
+        raise ValueError(
+            f"The strategy of {player.name} returned {action!r}, "
+            "which is not one of the player's actions."
+        ) from None
+
+
+def select_action_index_in_template(
+    template: "WorldTemplate",
+    player_class: type["Player"],
+    name: str,
+    location_name: str,
+    select_action: Callable[["Player"], Action],
+) -> int:
+    """Select an action for a copy of a player in the world of `template`.
+
+    The world is created once per process, so that only the names of the player
+    and its location have to be sent to a worker process."""
+    from .pawn import Pawn
+
+    player = player_class(name, Pawn(template.world[location_name]), select_action)
+    return select_action_index(player)
+
+
+@dataclass
+class SimultaneousScheduler(TurnScheduler):
+    """Let all players select their actions for the same state of the game.
+
+    The actions are selected in parallel if an `executor` is provided. Afterwards,
+    conflicts between the actions are resolved and all actions are executed as a
+    batch. The result of a round does not depend on the order of the players.
+
+    Without a `template`, the players themselves are sent to the executor, which
+    for process pools means pickling the whole world. With the `template` that
+    the world of the players was created from, only the names of the players and
+    their locations are sent; each worker process creates the world once. Players
+    selecting their actions on an executor have to return one of their `actions`.
+    """
+
+    executor: Executor | None = None
+    tick: int = 0
+    template: "WorldTemplate | None" = None
+
+    def take_turns(self, players: list["Player"]) -> None:
+        actions = self.select_actions(players)
+        for player, action in self.resolve_conflicts(list(zip(players, actions))):
+            action.execute(player)
+        self.tick += 1
+
+    def select_actions(self, players: list["Player"]) -> list[Action]:
+        if self.executor is None:
+            return [player.select_action(player) for player in players]
+        if self.template is None:
+            indices = self.executor.map(select_action_index, players)
+        else:
+            indices = self.executor.map(
+                select_action_index_in_template,
+                [self.template] * len(players),
+                [type(player) for player in players],
+                [player.name for player in players],
+                [player.location.name for player in players],
+                [player.select_action for player in players],
+            )
+        return [player.actions[index] for player, index in zip(players, indices)]
+
+    def resolve_conflicts(
+        self, intents: list[tuple["Player", Action]]
+    ) -> list[tuple["Player", Action]]:
+        """Give each exclusive resource to the player with the highest priority.
+
+        Players that lose a conflict skip their turn. The priorities depend only on
+        the current tick and the names of the players."""
+        from .actions import SkipTurnAction
+
+        claimed_resources = set()
+        result = []
+        for player, action in sorted(intents, key=lambda i: self.priority(i[0])):
+            resource = action.exclusive_resource
+            if resource is not None:
+                if resource in claimed_resources:
+                    action = SkipTurnAction()
+                else:
+                    claimed_resources.add(resource)
+            result.append((player, action))
+        return result
+
+    def priority(self, player: "Player") -> bytes:
+        return sha256(f"{self.tick}:{player.name}".encode()).digest()
@@ -0,0 +1,127 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from grasp_adventure.data.location_generators import grid_locations
+from grasp_adventure.data.locations import dungeon_locations
+from grasp_adventure.data.players import mixed_players, player_list
+from grasp_adventure.v5 import game_host
+from grasp_adventure.v5.game_host import GameHost, WorldTemplate
+from grasp_adventure.v5.game_objects import TreasureChest
+from grasp_adventure.v5.player import random_action_strategy
+from fixtures_v5 import *  # noqa
+
+
+@pytest.fixture()
+def host():
+    host = GameHost(games_per_shard=3)
+    host.add_template("simple", simple_locations)
+    return host
+
+
+def player_locations(game):
+    return [state.location_name for state in game.players]
+
+
+def test_create_game(host):
+    game = host.create_game("simple", mixed_players)
+
+    assert [state.name for state in game.players] == [
+        "Player 1",
+        "Player 2",
+        "Player 3",
+    ]
+    assert player_locations(game) == ["Room 1", "Room 2", "Room 2"]
+
+
+def test_games_share_their_world(host):
+    game_1 = host.create_game("simple", player_list)
+    game_2 = host.create_game("simple", player_list)
+
+    assert game_1.to_game().world is game_2.to_game().world
+
+
+def test_templates_with_the_same_key_do_not_share_their_world(host):
+    other_host = GameHost()
+    other_host.add_template("simple", dungeon_locations)
+
+    assert len(host.templates["simple"].world.locations) == 2
+    assert len(other_host.templates["simple"].world.locations) == 5
+
+
+def test_worlds_of_unused_templates_are_evicted(monkeypatch):
+    monkeypatch.setattr(game_host, "MAX_CACHED_WORLDS", 2)
+    templates = [WorldTemplate(f"t{i}", simple_locations) for i in range(3)]
+    first_world = templates[0].world
+
+    assert templates[0].world is first_world
+    for template in templates[1:]:
+        template.world
+
+    assert templates[0].template_id not in game_host._worlds
+    assert templates[0].world is not first_world
+
+
+def test_games_have_their_own_objects(host):
+    chest = TreasureChest()
+    game_1 = host.create_game("simple", player_list, objects={"chest": chest})
+    game_2 = host.create_game("simple", player_list, objects={"chest": chest})
+    state = game_1.to_state()
+
+    state.replace_object("chest", TreasureChest(gold=0))
+    game_1.objects["chest"] = state.objects["chest"]
+
+    assert game_1.objects == {"chest": TreasureChest(gold=0)}
+    assert game_2.objects == {"chest": TreasureChest(gold=50)}
+    assert state.location_of("Player 1") is game_1.to_game().world["Room 1"]
+
+
+def test_add_template_twice_raises_error(host):
+    with pytest.raises(ValueError):
+        host.add_template("simple", simple_locations)
+
+
+def test_template_rejects_one_shot_iterables():
+    with pytest.raises(TypeError):
+        WorldTemplate("grid 3x3", grid_locations(3, 3, seed=1))
+    with pytest.raises(TypeError):
+        GameHost().add_template("simple", iter(simple_locations))
+
+
+def test_template_from_generator():
+    host = GameHost()
+    host.add_template("grid 3x3", partial(grid_locations, 3, 3, seed=1))
+    game = host.create_game("grid 3x3", player_list)
+
+    host.play_rounds()
+
+    assert len(game.to_game().world.locations) == 9
+    assert player_locations(game) == ["Room 1,0", "Room 1,0"]
+
+
+def test_play_rounds(host):
+    games = [host.create_game("simple", mixed_players) for _ in range(10)]
+
+    host.play_rounds()
+
+    for game in games:
+        assert player_locations(game) == ["Room 2", "Room 1", "Room 1"]
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_play_rounds_on_executor(executor_class):
+    with executor_class(max_workers=2) as executor:
+        host = GameHost(executor, games_per_shard=3)
+        host.add_template("simple", simple_locations)
+        host.add_template("grid 4x4", partial(grid_locations, 4, 4))
+        simple_games = [host.create_game("simple", mixed_players) for _ in range(10)]
+        grid_games = [
+            host.create_game("grid 4x4", player_list, random_action_strategy)
+            for _ in range(10)
+        ]
+
+        host.play_rounds(3)
+
+    for game in simple_games:
+        assert player_locations(game) == ["Room 2", "Room 1", "Room 1"]
+    for game in grid_games:
+        assert all(name.startswith("Room ") for name in player_locations(game))
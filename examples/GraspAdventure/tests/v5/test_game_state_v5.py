@@ -0,0 +1,74 @@
+from dataclasses import replace
+
+from grasp_adventure.data.players import mixed_players
+from grasp_adventure.v5.actions import MoveAction, SkipTurnAction
+from grasp_adventure.v5.game_state import GameState
+from fixtures_v5 import *  # noqa
+
+
+@pytest.fixture()
+def game():
+    return GameFactory().create_game(simple_locations, mixed_players)
+
+
+@pytest.fixture()
+def state(game):
+    return GameState.from_game(game, {"Chest": TreasureChest(gold=10)})
+
+
+def test_from_game(game, state):
+    assert state.world is game.world
+    assert state.player_names == ["Player 1", "Player 2", "Player 3"]
+    assert state.location_of("Player 1") == game.world["Room 1"]
+    assert state.location_of("Player 2") == game.world["Room 2"]
+
+
+def test_actions_for(game, state):
+    assert state.actions_for("Player 1") == [
+        MoveAction("north", game.world["Room 2"]),
+        SkipTurnAction(),
+    ]
+
+
+def test_perform_move_action_does_not_change_original_state(game, state):
+    new_state = state.perform("Player 1", MoveAction("north", game.world["Room 2"]))
+
+    assert new_state.location_of("Player 1") == game.world["Room 2"]
+    assert state.location_of("Player 1") == game.world["Room 1"]
+    assert game.players[0].location == game.world["Room 1"]
+
+
+def test_perform_skip_turn_action(game, state):
+    new_state = state.perform("Player 1", SkipTurnAction())
+
+    assert new_state.location_of("Player 1") == game.world["Room 1"]
+
+
+def test_forks_share_the_world_and_unchanged_positions(state):
+    fork_1 = state.fork()
+    fork_2 = state.fork()
+    fork_1.move("Player 2", state.world["Room 1"])
+
+    assert fork_1.world is fork_2.world is state.world
+    assert fork_1.location_of("Player 2") == state.world["Room 1"]
+    assert fork_2.location_of("Player 2") == state.world["Room 2"]
+    assert fork_1.positions.parents.maps[0] is state.positions.maps[0]
+
+
+def test_replace_object_in_fork(state):
+    fork = state.fork()
+    fork.replace_object("Chest", replace(fork.objects["Chest"], gold=0))
+
+    assert fork.objects["Chest"].gold == 0
+    assert state.objects["Chest"].gold == 10
+
+
+def test_deep_forks_are_compacted(game, state):
+    room_1, room_2 = game.world["Room 1"], game.world["Room 2"]
+    for _ in range(100):
+        state = state.perform("Player 1", MoveAction("north", room_2))
+        state = state.perform("Player 1", MoveAction("south", room_1))
+
+    assert len(state.positions.maps) <= 34
+    assert state.location_of("Player 1") == room_1
+    assert state.location_of("Player 3") == room_2
@@ -0,0 +1,116 @@
+import weakref
+
+from grasp_adventure.data.location_generators import (
+    cave_locations,
+    grid_locations,
+    random_graph_locations,
+)
+from fixtures_v5 import *  # noqa
+
+
+def connections_are_symmetric(world):
+    return all(
+        location in target.connections.values()
+        for location in world.locations.values()
+        for target in location.connections.values()
+    )
+
+
+def reachable_location_names(world):
+    visited = {world.initial_location_name}
+    todo = [world.initial_location]
+    while todo:
+        location = todo.pop()
+        for target in location.connections.values():
+            if target.name not in visited:
+                visited.add(target.name)
+                todo.append(target)
+    return visited
+
+
+def test_grid_locations():
+    world = GameFactory().create_world(grid_locations(4, 3))
+
+    assert len(world.locations) == 12
+    assert world.initial_location_name == "Room 0,0"
+    assert world["Room 1,1"]["north"] == world["Room 1,0"]
+    assert world["Room 1,1"]["south"] == world["Room 1,2"]
+    assert connections_are_symmetric(world)
+
+
+def test_cave_locations_form_a_perfect_maze():
+    world = GameFactory().create_world(cave_locations(20, 15, seed=1))
+    num_connections = sum(len(loc.connections) for loc in world.locations.values())
+
+    assert len(world.locations) == 300
+    assert num_connections // 2 == 299
+    assert connections_are_symmetric(world)
+    assert len(reachable_location_names(world)) == 300
+
+
+def test_cave_locations_with_loops():
+    world = GameFactory().create_world(
+        cave_locations(20, 15, seed=1, loop_probability=0.3)
+    )
+    num_connections = sum(len(loc.connections) for loc in world.locations.values())
+
+    assert num_connections // 2 > 299
+    assert connections_are_symmetric(world)
+    assert len(reachable_location_names(world)) == 300
+
+
+def test_random_graph_locations():
+    world = GameFactory().create_world(random_graph_locations(1001, seed=7))
+
+    assert len(world.locations) == 1001
+    assert connections_are_symmetric(world)
+    assert len(reachable_location_names(world)) == 1001
+
+
+def test_generators_are_deterministic_for_a_seed():
+    assert list(cave_locations(8, 8, seed=3)) == list(cave_locations(8, 8, seed=3))
+    assert list(random_graph_locations(50, seed=3)) == list(
+        random_graph_locations(50, seed=3)
+    )
+
+
+def test_generators_are_lazy():
+    locations = random_graph_locations(10**9, seed=3)
+
+    assert next(locations)["name"] == "Room 0"
+    assert next(locations)["name"] == "Room 1"
+
+
+def test_create_world_from_empty_descriptions_raises_error():
+    with pytest.raises(ValueError):
+        GameFactory().create_world(iter([]))
+
+
+def test_create_world_does_not_keep_descriptions():
+    class Mapping(dict):
+        pass
+
+    references = []
+    num_alive = []
+
+    def descriptions():
+        for location in grid_locations(3, 3):
+            num_alive.append(sum(reference() is not None for reference in references))
+            description = Mapping(
+                location, connections=Mapping(location["connections"])
+            )
+            references.append(weakref.ref(description))
+            references.append(weakref.ref(description["connections"]))
+            yield description
+
+    world = GameFactory().create_world(descriptions())
+
+    assert max(num_alive) <= 2
+    assert world["Room 0,0"]["south"] is world["Room 0,1"]
+    assert world["Room 0,1"].description != ""
+    assert connections_are_symmetric(world)
+
+
+def test_create_world_with_undescribed_location_raises_error():
+    with pytest.raises(ValueError):
+        GameFactory().create_world([{"name": "Hall", "connections": {"up": "Attic"}}])
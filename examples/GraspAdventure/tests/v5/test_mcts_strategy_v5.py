@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import pickle
+
+from grasp_adventure.data.locations import dungeon_locations
+from collections import ChainMap
+
+from grasp_adventure.v5.actions import MoveAction
+from grasp_adventure.v5.game_state import GameState
+from grasp_adventure.data.location_generators import grid_locations
+from grasp_adventure.v5.game_host import WorldTemplate
+from grasp_adventure.v5.mcts_strategy import GoalReward, MctsStrategy, SearchSettings
+from fixtures_v5 import *  # noqa
+
+
+@pytest.fixture()
+def dungeon():
+    return GameFactory().create_world(dungeon_locations)
+
+
+def create_player(dungeon, strategy):
+    return Player("NPC", Pawn(dungeon["Vestibule"]), select_action=strategy)
+
+
+def test_goal_reward(dungeon):
+    state = GameState(dungeon, ChainMap({"NPC": dungeon["Treasure Chamber"]}))
+
+    assert GoalReward("Treasure Chamber")(state, "NPC") == 1.0
+    assert GoalReward("Vestibule")(state, "NPC") == 0.0
+
+
+def test_mcts_strategy_finds_the_goal(dungeon):
+    strategy = MctsStrategy(
+        dungeon, SearchSettings(GoalReward("Treasure Chamber"), iterations=300), seed=1
+    )
+    player = create_player(dungeon, strategy)
+
+    for _ in range(3):
+        player.take_turn()
+
+    assert player.location == dungeon["Treasure Chamber"]
+
+
+def test_mcts_strategy_stays_at_the_goal(dungeon):
+    strategy = MctsStrategy(
+        dungeon, SearchSettings(GoalReward("Vestibule"), iterations=200), seed=1
+    )
+    player = create_player(dungeon, strategy)
+
+    player.take_turn()
+
+    assert player.location == dungeon["Vestibule"]
+
+
+def test_mcts_strategy_reuses_subtree(dungeon):
+    strategy = MctsStrategy(
+        dungeon, SearchSettings(GoalReward("Treasure Chamber"), iterations=200), seed=1
+    )
+    player = create_player(dungeon, strategy)
+
+    action = strategy(player)
+    reused_root = strategy._root
+
+    assert action == MoveAction("north", dungeon["Entrance Hall"])
+    assert reused_root.visits > 0
+
+    action.execute(player)
+    strategy(player)
+
+    assert reused_root.visits > 200
+
+
+def test_mcts_strategy_discards_subtree_if_player_was_moved(dungeon):
+    strategy = MctsStrategy(
+        dungeon, SearchSettings(GoalReward("Vestibule"), iterations=50), seed=1
+    )
+    player = create_player(dungeon, strategy)
+
+    strategy(player)
+    old_root = strategy._root
+    old_visits = old_root.visits
+    player.location = dungeon["Brightly Lit Corridor"]
+    strategy(player)
+
+    assert old_root.visits == old_visits
+
+
+def test_mcts_strategy_with_time_budget(dungeon):
+    strategy = MctsStrategy(
+        dungeon,
+        SearchSettings(
+            GoalReward("Treasure Chamber"), iterations=None, time_budget=0.05
+        ),
+        seed=1,
+    )
+
+    strategy(create_player(dungeon, strategy))
+
+    assert strategy.stats.rollouts > 0
+    assert strategy.stats.seconds >= 0.05
+    assert strategy.stats.rollouts_per_second > 0
+
+
+def test_search_settings_need_a_budget():
+    with pytest.raises(ValueError):
+        SearchSettings(GoalReward("Vestibule"), iterations=None)
+
+
+def test_mcts_strategy_with_thread_pool(dungeon):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        strategy = MctsStrategy(
+            dungeon,
+            SearchSettings(GoalReward("Treasure Chamber"), iterations=200),
+            seed=1,
+            executor=executor,
+            num_workers=2,
+        )
+        player = create_player(dungeon, strategy)
+
+        for _ in range(3):
+            player.take_turn()
+
+    assert player.location == dungeon["Treasure Chamber"]
+    assert strategy.stats.rollouts == 3 * 2 * 200
+
+
+def test_mcts_strategy_with_process_pool():
+    template = WorldTemplate("dungeon", dungeon_locations)
+    world = template.world
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        strategy = MctsStrategy(
+            template,
+            SearchSettings(GoalReward("Treasure Chamber"), iterations=200),
+            seed=1,
+            executor=executor,
+            num_workers=2,
+        )
+        player = create_player(world, strategy)
+
+        for _ in range(3):
+            player.take_turn()
+
+    assert player.location == world["Treasure Chamber"]
+    assert strategy.stats.rollouts == 3 * 2 * 200
+
+
+def test_mcts_strategy_is_pickled_without_executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        strategy = MctsStrategy(
+            WorldTemplate("dungeon", dungeon_locations),
+            SearchSettings(GoalReward("Treasure Chamber"), iterations=50),
+            seed=1,
+            executor=executor,
+            num_workers=2,
+        )
+        copied_strategy = pickle.loads(pickle.dumps(strategy))
+
+    assert strategy.executor is executor
+    assert copied_strategy.executor is None
+    assert copied_strategy.settings == strategy.settings
+
+
+def test_mcts_strategy_on_process_pool_with_large_world():
+    template = WorldTemplate("grid 30x30", partial(grid_locations, 30, 30, seed=1))
+    world = template.world
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        strategy = MctsStrategy(
+            template,
+            SearchSettings(GoalReward("Room 0,2"), iterations=100),
+            seed=1,
+            executor=executor,
+            num_workers=2,
+        )
+        player = Player("NPC", Pawn(world["Room 0,0"]), select_action=strategy)
+
+        for _ in range(2):
+            player.take_turn()
+
+    assert player.location is world["Room 0,2"]
+    assert strategy.stats.rollouts == 2 * 2 * 100
@@ -0,0 +1,175 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+from grasp_adventure.data.location_generators import grid_locations
+from grasp_adventure.data.players import players_in_simple_locations
+from grasp_adventure.v5.actions import SkipTurnAction
+from grasp_adventure.v5.base_classes import Action
+from grasp_adventure.v5.game import Game
+from grasp_adventure.v5.game_host import WorldTemplate
+from grasp_adventure.v5.scheduler import SequentialScheduler, SimultaneousScheduler
+from fixtures_v5 import *  # noqa
+
+
+@dataclass
+class OpenChestAction(Action):
+    @property
+    def description(self) -> str:
+        return "open the chest"
+
+    @property
+    def exclusive_resource(self):
+        return "chest"
+
+    def execute(self, instigator: "Player") -> None:
+        instigator.name += " (opened chest)"
+
+
+@dataclass
+class InspectChest(Action):
+    @property
+    def description(self) -> str:
+        return "inspect the chest"
+
+    def execute(self, instigator: "Player") -> None:
+        instigator.name += " (inspected chest)"
+
+
+def open_chest_strategy(player):
+    return OpenChestAction()
+
+
+class ChestPlayer(Player):
+    @property
+    def actions(self):
+        return [OpenChestAction(), SkipTurnAction()]
+
+
+def create_game(scheduler, player_descriptions=players_in_simple_locations):
+    game = GameFactory().create_game(simple_locations, player_descriptions)
+    game.scheduler = scheduler
+    return game
+
+
+def location_names(game):
+    return {player.name: player.location.name for player in game.players}
+
+
+def test_game_uses_sequential_scheduler_by_default():
+    game = GameFactory().create_game(simple_locations, players_in_simple_locations)
+
+    assert isinstance(game.scheduler, SequentialScheduler)
+
+
+def test_simultaneous_round():
+    game = create_game(SimultaneousScheduler())
+
+    game.take_turns()
+
+    assert location_names(game) == {
+        "Player 1": "Room 2",
+        "Player 2": "Room 1",
+        "Player 3": "Room 1",
+    }
+    assert game.scheduler.tick == 1
+
+
+def test_players_select_actions_for_the_same_state(level):
+    observed_locations = []
+    player_1 = Player("Player 1", Pawn(level["Room 1"]))
+
+    def observing_strategy(player):
+        observed_locations.append(player_1.location.name)
+        return SkipTurnAction()
+
+    player_2 = Player("Player 2", Pawn(level["Room 1"]), observing_strategy)
+
+    Game([player_1, player_2], level, SequentialScheduler()).take_turns()
+    player_1.location = level["Room 1"]
+    Game([player_1, player_2], level, SimultaneousScheduler()).take_turns()
+
+    assert observed_locations == ["Room 2", "Room 1"]
+
+
+def test_conflicts_are_resolved_independently_of_player_order(level):
+    def create_players():
+        return [
+            ChestPlayer(name, Pawn(level["Room 1"]), open_chest_strategy)
+            for name in ["Alice", "Bob", "Carol"]
+        ]
+
+    players = create_players()
+    reversed_players = create_players()[::-1]
+
+    SimultaneousScheduler().take_turns(players)
+    SimultaneousScheduler().take_turns(reversed_players)
+
+    winners = [p.name for p in players if p.name.endswith("(opened chest)")]
+    assert len(winners) == 1
+    assert winners == [
+        p.name for p in reversed_players if p.name.endswith("(opened chest)")
+    ]
+
+
+def test_resolve_conflicts_keeps_actions_without_exclusive_resource(level):
+    player_1 = Player("Player 1", Pawn(level["Room 1"]))
+    player_2 = Player("Player 2", Pawn(level["Room 1"]))
+    action = player_1.actions[0]
+
+    intents = SimultaneousScheduler().resolve_conflicts(
+        [(player_1, action), (player_2, action)]
+    )
+
+    assert sorted(intent[0].name for intent in intents) == ["Player 1", "Player 2"]
+    assert [intent[1] for intent in intents] == [action, action]
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_simultaneous_round_with_executor(executor_class):
+    with executor_class(max_workers=2) as executor:
+        game = create_game(SimultaneousScheduler(executor))
+        game.take_turns()
+        game.take_turns()
+        game.take_turns()
+
+    assert location_names(game) == {
+        "Player 1": "Room 2",
+        "Player 2": "Room 1",
+        "Player 3": "Room 1",
+    }
+    assert game.players[0].location is game.world["Room 2"]
+
+
+def test_simultaneous_round_on_process_pool_with_template():
+    template = WorldTemplate("grid 30x30", partial(grid_locations, 30, 30))
+    world = template.world
+    players = [
+        Player(f"Player {i}", Pawn(world[f"Room {i},0"])) for i in range(0, 30, 10)
+    ]
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        SimultaneousScheduler(executor, template=template).take_turns(players)
+
+    assert [player.location.name for player in players] == [
+        "Room 1,0",
+        "Room 9,0",
+        "Room 19,0",
+    ]
+    assert players[0].location is world["Room 1,0"]
+
+
+def test_strategies_may_return_other_actions_without_executor(level):
+    player = ChestPlayer("Alice", Pawn(level["Room 1"]), lambda p: InspectChest())
+
+    SimultaneousScheduler().take_turns([player])
+
+    assert player.name == "Alice (inspected chest)"
+
+
+def test_strategies_on_executor_must_return_one_of_their_actions(level):
+    player = ChestPlayer("Alice", Pawn(level["Room 1"]), lambda p: InspectChest())
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError):
+            SimultaneousScheduler(executor).take_turns([player])
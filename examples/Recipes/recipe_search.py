@@ -0,0 +1,400 @@
+﻿from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from heapq import heappush, heapreplace
+from itertools import accumulate
+from math import log
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+import re
+import struct
+import sys
+from typing import Iterable, Iterator
+
+# File layout: header, document lengths, term dictionary, postings.
+# The postings of each term are split into blocks of `_BLOCK_SIZE` documents.
+# They start with a table holding the last document, the end offset, the highest
+# term frequency and the shortest document length of each block as 32-bit
+# integers, followed by the blocks as varint-encoded pairs of (distance to the
+# previous document, term frequency).
+_MAGIC = b"RIX2"
+_HEADER = struct.Struct("<4sIIQQ")
+_BLOCK_SIZE = 128
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Words that occur in nearly every instruction. They are not indexed, since they
+# hardly change the ranking but have the longest postings.
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the then to with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def _encode_varint(value: int, buffer: bytearray):
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _decode_varints(data: bytes) -> Iterator[int]:
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            yield value
+            value = shift = 0
+        else:
+            shift += 7
+
+
+def _decode_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _little_endian(lengths: array) -> array:
+    if sys.byteorder == "big":
+        lengths = array(lengths.typecode, lengths)
+        lengths.byteswap()
+    return lengths
+
+
+class _PostingsCursor:
+    """Walks through the postings of one term, decoding one block at a time.
+
+    `document` and `frequency` describe the current posting; `document` is `end`
+    once all postings have been visited. `block` is the index of the current
+    block, which ends with `block_last_document`.
+    """
+
+    def __init__(
+        self, postings: bytes | mmap, offset: int, num_postings: int, end: int
+    ):
+        num_blocks = -(-num_postings // _BLOCK_SIZE)
+        table = array("I")
+        table.frombytes(postings[offset : offset + 16 * num_blocks])
+        table = _little_endian(table)
+        self._postings = postings
+        self._blocks_start = offset + 16 * num_blocks
+        self._last_documents = table[::4].tolist()
+        self._block_ends = table[1::4].tolist()
+        self.block_max_frequencies = table[2::4].tolist()
+        self.block_min_lengths = table[3::4].tolist()
+        self._end = end
+        self._load_block(0)
+
+    def _load_block(self, block: int):
+        self.block = block
+        if block == len(self._last_documents):
+            self.document = self.block_last_document = self._end
+            return
+        self.block_last_document = self._last_documents[block]
+        start = self._blocks_start + (self._block_ends[block - 1] if block else 0)
+        data = self._postings[start : self._blocks_start + self._block_ends[block]]
+        # Without multi-byte varints every byte is a value of its own.
+        values = list(data) if max(data) < 0x80 else list(_decode_varints(data))
+        if block:
+            values[0] += self._last_documents[block - 1]
+        self._documents = list(accumulate(values[::2]))
+        self._frequencies = values[1::2]
+        self._position = 0
+        self.document = self._documents[0]
+        self.frequency = self._frequencies[0]
+
+    def read_until(self, last_document: int) -> tuple[list[int], list[int]]:
+        """Return the documents up to `last_document` and their frequencies and move
+        past them. `last_document` must not lie beyond the current block."""
+        if self.document > last_document:
+            return [], []
+        if last_document == self.block_last_document:
+            documents = self._documents[self._position :]
+            frequencies = self._frequencies[self._position :]
+            self._load_block(self.block + 1)
+            return documents, frequencies
+        position = bisect_right(self._documents, last_document, self._position)
+        documents = self._documents[self._position : position]
+        frequencies = self._frequencies[self._position : position]
+        self._position = position
+        self.document = self._documents[position]
+        self.frequency = self._frequencies[position]
+        return documents, frequencies
+
+    def seek(self, target: int):
+        """Move to the first document that is not before `target`.
+
+        Blocks that end before `target` are skipped without being decoded.
+        """
+        if target <= self.document:
+            return
+        if target > self.block_last_document:
+            self._load_block(bisect_left(self._last_documents, target, self.block + 1))
+            if self.document == self._end:
+                return
+        self._position = bisect_left(self._documents, target, self._position)
+        self.document = self._documents[self._position]
+        self.frequency = self._frequencies[self._position]
+
+
+class InstructionIndex:
+    """Inverted index over recipe instructions, ranked with BM25.
+
+    Documents are identified by their position in the indexed sequence, which is
+    the position of the recipe in its `RecipeBook`. An index loaded from disk keeps
+    its postings in a memory-mapped file and only decodes the postings of the
+    terms in a query.
+    """
+
+    def __init__(
+        self,
+        document_lengths: array,
+        terms: dict[str, tuple[int, int, int]],
+        postings: bytes | mmap,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.k1 = k1
+        self.b = b
+        self._document_lengths = document_lengths
+        # Maps each term to its document frequency and the position of its
+        # postings in `_postings`.
+        self._terms = terms
+        self._postings = postings
+        self._average_length = (
+            sum(document_lengths) / len(document_lengths) if document_lengths else 0.0
+        )
+
+    @classmethod
+    def build(
+        cls,
+        instructions: Iterable[str],
+        stop_words: Iterable[str] = STOP_WORDS,
+        **kwargs,
+    ) -> "InstructionIndex":
+        stop_words = frozenset(stop_words)
+        document_lengths = array("I")
+        postings_by_term: dict[str, list[tuple[int, int]]] = {}
+        for document, text in enumerate(instructions):
+            tokens = [token for token in tokenize(text) if token not in stop_words]
+            document_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                postings_by_term.setdefault(term, []).append((document, frequency))
+
+        terms = {}
+        postings = bytearray()
+        for term, term_postings in postings_by_term.items():
+            offset = len(postings)
+            table = array("I")
+            blocks = bytearray()
+            previous_document = 0
+            for start in range(0, len(term_postings), _BLOCK_SIZE):
+                block = term_postings[start : start + _BLOCK_SIZE]
+                for document, frequency in block:
+                    _encode_varint(document - previous_document, blocks)
+                    _encode_varint(frequency, blocks)
+                    previous_document = document
+                table.append(previous_document)
+                table.append(len(blocks))
+                table.append(max(frequency for _, frequency in block))
+                table.append(min(document_lengths[document] for document, _ in block))
+            postings += _little_endian(table).tobytes()
+            postings += blocks
+            terms[term] = (len(term_postings), offset, len(postings) - offset)
+        return cls(document_lengths, terms, bytes(postings), **kwargs)
+
+    def save(self, path: str | Path):
+        dictionary = bytearray()
+        for term, (document_frequency, offset, size) in self._terms.items():
+            encoded_term = term.encode()
+            _encode_varint(len(encoded_term), dictionary)
+            dictionary += encoded_term
+            _encode_varint(document_frequency, dictionary)
+            _encode_varint(offset, dictionary)
+            _encode_varint(size, dictionary)
+        with open(path, "wb") as file:
+            file.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    len(self._document_lengths),
+                    len(self._terms),
+                    len(dictionary),
+                    len(self._postings),
+                )
+            )
+            file.write(_little_endian(self._document_lengths).tobytes())
+            file.write(dictionary)
+            file.write(self._postings)
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs) -> "InstructionIndex":
+        with open(path, "rb") as file:
+            data = mmap(file.fileno(), 0, access=ACCESS_READ)
+        magic, num_documents, num_terms, dictionary_size, postings_size = (
+            _HEADER.unpack_from(data)
+        )
+        if magic != _MAGIC:
+            data.close()
+            raise ValueError(f"{path} is not an instruction index.")
+
+        offset = _HEADER.size
+        document_lengths = array("I")
+        document_lengths.frombytes(data[offset : offset + 4 * num_documents])
+        document_lengths = _little_endian(document_lengths)
+        offset += 4 * num_documents
+
+        dictionary = data[offset : offset + dictionary_size]
+        postings_start = offset + dictionary_size
+        terms = {}
+        offset = 0
+        for _ in range(num_terms):
+            term_size, offset = _decode_varint(dictionary, offset)
+            term = dictionary[offset : offset + term_size].decode()
+            offset += term_size
+            document_frequency, offset = _decode_varint(dictionary, offset)
+            term_offset, offset = _decode_varint(dictionary, offset)
+            size, offset = _decode_varint(dictionary, offset)
+            terms[term] = (document_frequency, postings_start + term_offset, size)
+        return cls(document_lengths, terms, data, **kwargs)
+
+    def close(self):
+        if isinstance(self._postings, mmap):
+            self._postings.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._document_lengths)
+
+    def _cursor(self, term: str) -> _PostingsCursor:
+        document_frequency, offset, _ = self._terms[term]
+        return _PostingsCursor(self._postings, offset, document_frequency, len(self))
+
+    def postings(self, term: str) -> list[tuple[int, int]]:
+        """Return the documents containing `term` with the frequency of `term`."""
+        if term not in self._terms:
+            return []
+        cursor = self._cursor(term)
+        result = []
+        while cursor.document < len(self):
+            result += zip(*cursor.read_until(cursor.block_last_document))
+        return result
+
+    def _norm(self, length: int) -> float:
+        return self.k1 * (1 - self.b + self.b * length / self._average_length)
+
+    def search(self, query: str, k: int = 10) -> list[tuple[int, float]]:
+        """Return the `k` best documents for `query` with their BM25 scores.
+
+        The postings of the query terms are read in step, a window of documents at
+        a time. Once `k` documents have been found, the `k`-th best score is a
+        threshold that other documents have to reach. The highest term frequency
+        and the shortest document of each block bound the scores in that block,
+        so windows whose bounds stay below the threshold are skipped without being
+        decoded. Terms whose combined bounds stay below it are only looked up for
+        the documents that contain one of the other terms (MaxScore).
+        """
+        num_documents = len(self)
+        query_terms = []
+        for term in dict.fromkeys(tokenize(query)):
+            if term not in self._terms:
+                continue
+            document_frequency = self._terms[term][0]
+            idf = log(
+                1
+                + (num_documents - document_frequency + 0.5)
+                / (document_frequency + 0.5)
+            )
+            weight = idf * (self.k1 + 1)
+            cursor = self._cursor(term)
+            # Slightly raised, so that rounding never makes a score exceed them.
+            block_bounds = [
+                weight * frequency / (frequency + self._norm(length)) * (1 + 1e-9)
+                for frequency, length in zip(
+                    cursor.block_max_frequencies, cursor.block_min_lengths
+                )
+            ]
+            # The bound of an exhausted cursor.
+            block_bounds.append(0.0)
+            query_terms.append((max(block_bounds), weight, block_bounds, cursor))
+        if k <= 0 or not query_terms:
+            return []
+        query_terms.sort(key=lambda query_term: query_term[0])
+        # `bounds[i]` is the highest score from the terms up to `i`.
+        bounds = list(accumulate(query_term[0] for query_term in query_terms))
+        top: list[tuple[float, int]] = []
+        threshold = 0.0
+        num_optional = 0
+        optional_bound = 0.0
+        required = [query_term[1:] for query_term in query_terms]
+        document_lengths = self._document_lengths
+        k1, b, average_length = self.k1, self.b, self._average_length
+        while required:
+            # The documents up to the end of the first block of a required term
+            # are scored together. None of them can score more than the bounds
+            # of the current blocks.
+            first_document = min([cursor.document for _, _, cursor in required])
+            if first_document == num_documents:
+                break
+            last_document = min(
+                [cursor.block_last_document for _, _, cursor in required]
+            )
+            minimum = threshold - optional_bound
+            if len(top) == k and minimum > sum(
+                [block_bounds[cursor.block] for _, block_bounds, cursor in required]
+            ):
+                for _, _, cursor in required:
+                    cursor.seek(last_document + 1)
+                continue
+            scores: dict[int, float] = {}
+            for weight, _, cursor in required:
+                for document, frequency in zip(*cursor.read_until(last_document)):
+                    norm = k1 * (
+                        1 - b + b * document_lengths[document] / average_length
+                    )
+                    score = weight * frequency / (frequency + norm)
+                    scores[document] = scores.get(document, 0.0) + score
+            # Ascending, since the optional cursors only move forward.
+            for document, score in sorted(scores.items()):
+                if len(top) == k and score < minimum:
+                    continue
+                norm = k1 * (1 - b + b * document_lengths[document] / average_length)
+                for i in reversed(range(num_optional)):
+                    if score + bounds[i] < threshold:
+                        break
+                    _, weight, _, cursor = query_terms[i]
+                    cursor.seek(document)
+                    if cursor.document == document:
+                        frequency = cursor.frequency
+                        score += weight * frequency / (frequency + norm)
+                if len(top) < k:
+                    heappush(top, (score, -document))
+                elif (score, -document) > top[0]:
+                    heapreplace(top, (score, -document))
+                else:
+                    continue
+                if len(top) == k:
+                    threshold = top[0][0]
+                    while (
+                        num_optional < len(bounds) and bounds[num_optional] < threshold
+                    ):
+                        optional_bound = bounds[num_optional]
+                        num_optional += 1
+                    minimum = threshold - optional_bound
+            required = [query_term[1:] for query_term in query_terms[num_optional:]]
+        return [
+            (-negative_document, score)
+            for score, negative_document in sorted(top, reverse=True)
+        ]
@@ -1,5 +1,10 @@
 ﻿from dataclasses import dataclass, field
-from typing import Optional
+from enum import Enum
+from heapq import merge
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from recipe_search import InstructionIndex
 
 @dataclass
 class Recipe:
@@ -9,36 +14,122 @@ class Recipe:
     rating: Optional[int] = None
 
 
+class DuplicateNamePolicy(Enum):
+    KEEP_FIRST = "keep first"
+    KEEP_LAST = "keep last"
+    RAISE = "raise"
+
+
 @dataclass
 class RecipeBook:
     recipes: list[Recipe] = field(default_factory=list)
+    duplicate_name_policy: DuplicateNamePolicy = DuplicateNamePolicy.KEEP_FIRST
+    _recipes_by_name: dict[str, Recipe] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+    # Maps each ingredient to the (ascending) positions of the recipes using it.
+    _recipe_positions_by_ingredient: dict[str, list[int]] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+    # Maps each rating to the (ascending) positions of the recipes with this rating;
+    # unrated recipes are stored under `None`.
+    _recipe_positions_by_rating: dict[Optional[int], list[int]] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+
+    def __post_init__(self):
+        for position, recipe in enumerate(self.recipes):
+            self._check_name(recipe)
+            self._index_recipe(position, recipe)
 
     def add_recipe(self, recipe: Recipe):
+        self._check_name(recipe)
         self.recipes.append(recipe)
+        self._index_recipe(len(self.recipes) - 1, recipe)
+
+    def _check_name(self, recipe: Recipe):
+        if (
+            self.duplicate_name_policy is DuplicateNamePolicy.RAISE
+            and recipe.name in self._recipes_by_name
+        ):
+            raise ValueError(f"recipe {recipe.name} already exists!")
+
+    def _index_recipe(self, position: int, recipe: Recipe):
+        if (
+            self.duplicate_name_policy is DuplicateNamePolicy.KEEP_LAST
+            or recipe.name not in self._recipes_by_name
+        ):
+            self._recipes_by_name[recipe.name] = recipe
+        for ingredient in dict.fromkeys(recipe.ingredients):
+            self._recipe_positions_by_ingredient.setdefault(ingredient, []).append(
+                position
+            )
+        self._recipe_positions_by_rating.setdefault(recipe.rating, []).append(position)
 
     def get_recipe_by_name(self, name: str) -> Recipe:
-        for recipe in self.recipes:
-            if recipe.name == name:
-                return recipe
-        raise KeyError(f"recipe {name} not found!")
+        try:
+            return self._recipes_by_name[name]
+        except KeyError:
+            raise KeyError(f"recipe {name} not found!") from None
 
     def get_recipes_with_ingredient(self, ingredient: str) -> list[Recipe]:
-        result = []
-        for recipe in self.recipes:
-            if ingredient in recipe.ingredients:
-                result.append(recipe)
-        return result
+        positions = self._recipe_positions_by_ingredient.get(ingredient, [])
+        return [self.recipes[position] for position in positions]
+
+    def get_recipes_with_all_ingredients(
+        self, ingredients: Iterable[str]
+    ) -> list[Recipe]:
+        postings = sorted(
+            (
+                self._recipe_positions_by_ingredient.get(ingredient, [])
+                for ingredient in ingredients
+            ),
+            key=len,
+        )
+        if not postings:
+            return list(self.recipes)
+        positions = set(postings[0]).intersection(*postings[1:])
+        return [self.recipes[position] for position in sorted(positions)]
+
+    def get_recipes_with_any_ingredient(
+        self, ingredients: Iterable[str]
+    ) -> list[Recipe]:
+        positions = set().union(
+            *(
+                self._recipe_positions_by_ingredient.get(ingredient, [])
+                for ingredient in ingredients
+            )
+        )
+        return [self.recipes[position] for position in sorted(positions)]
+
+    def build_instruction_index(self) -> InstructionIndex:
+        return InstructionIndex.build(recipe.instructions for recipe in self.recipes)
+
+    def search_instructions(
+        self, index: InstructionIndex, query: str, k: int = 10
+    ) -> list[Recipe]:
+        return [self.recipes[position] for position, _ in index.search(query, k)]
 
     def get_recipes_by_rating(self, rating: int) -> list[Recipe]:
-        result = []
-        for recipe in self.recipes:
-            if recipe.rating == rating:
-                result.append(recipe)
-        return result
+        positions = self._recipe_positions_by_rating.get(rating, [])
+        return [self.recipes[position] for position in positions]
 
     def get_recipes_above_rating(self, min_rating: int) -> list[Recipe]:
-        result = []
-        for recipe in self.recipes:
-            if recipe.rating is None or recipe.rating >= min_rating:
-                result.append(recipe)
-        return result
\ No newline at end of file
+        return list(self._recipes_above_rating(min_rating))
+
+    def iter_recipes_above_rating(
+        self, min_rating: int, page_size: int = 100
+    ) -> Iterator[list[Recipe]]:
+        if page_size < 1:
+            raise ValueError("page_size must be positive.")
+        recipes = self._recipes_above_rating(min_rating)
+        while page := list(islice(recipes, page_size)):
+            yield page
+
+    def _recipes_above_rating(self, min_rating: int) -> Iterator[Recipe]:
+        postings = [
+            positions
+            for rating, positions in self._recipe_positions_by_rating.items()
+            if rating is None or rating >= min_rating
+        ]
+        return (self.recipes[position] for position in merge(*postings))
\ No newline at end of file
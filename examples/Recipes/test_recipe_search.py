@@ -0,0 +1,141 @@
+﻿from collections import Counter
+from math import log
+from random import Random
+
+from recipe_search import InstructionIndex, tokenize
+from recipes import Recipe, RecipeBook
+import pytest
+
+
+@pytest.fixture
+def recipe_book():
+    return RecipeBook(
+        [
+            Recipe(
+                "Pancakes", ["flour", "milk"], "Mix flour and milk. Fry the batter."
+            ),
+            Recipe("Tea", ["tea"], "Boil water. Steep the tea."),
+            Recipe("Soup", ["water"], "Boil water, add salt, boil again."),
+        ]
+    )
+
+
+@pytest.fixture
+def index(recipe_book):
+    return recipe_book.build_instruction_index()
+
+
+def test_tokenize():
+    assert tokenize("Boil water, add Salt!") == ["boil", "water", "add", "salt"]
+    assert tokenize("Käse reiben") == ["käse", "reiben"]
+
+
+def test_postings(index):
+    assert index.postings("boil") == [(1, 1), (2, 2)]
+    assert index.postings("flour") == [(0, 1)]
+    assert index.postings("nonexistent") == []
+
+
+def test_search(index):
+    assert [position for position, _ in index.search("boil")] == [2, 1]
+    assert [position for position, _ in index.search("boil tea")] == [1, 2]
+    assert index.search("boil", k=1)[0][0] == 2
+    assert index.search("nonexistent") == []
+
+
+def test_search_skips_stop_words(index):
+    assert index.postings("the") == []
+    assert index.search("the") == []
+    assert InstructionIndex.build(["Steep the tea."], stop_words=()).postings(
+        "the"
+    ) == [(0, 1)]
+
+
+def test_search_prunes_like_exhaustive_search(tmp_path):
+    random = Random(42)
+    words = ["add", "salt", "boil", "water", "stir", "pepper", "oil", "pan"]
+    index = InstructionIndex.build(
+        " ".join(random.choices(words, k=random.randrange(1, 20))) for _ in range(2000)
+    )
+    path = tmp_path / "instructions.idx"
+    index.save(path)
+    with InstructionIndex.load(path) as loaded_index:
+        for query in ["add salt", "boil water pepper", "oil", "pan stir add salt"]:
+            # With `k` as large as the index, no document can be pruned.
+            expected = index.search(query, k=len(index))[:10]
+            for result in index.search(query), loaded_index.search(query):
+                assert [position for position, _ in result] == [
+                    position for position, _ in expected
+                ]
+                assert [score for _, score in result] == pytest.approx(
+                    [score for _, score in expected]
+                )
+
+
+def _exhaustive_search(instructions, query, k, k1=1.2, b=0.75):
+    documents = [Counter(tokenize(text)) for text in instructions]
+    lengths = [sum(document.values()) for document in documents]
+    average_length = sum(lengths) / len(lengths)
+    scores = {}
+    for term in set(tokenize(query)):
+        document_frequency = sum(term in document for document in documents)
+        if not document_frequency:
+            continue
+        idf = log(
+            1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        for position, document in enumerate(documents):
+            if term in document:
+                frequency = document[term]
+                norm = k1 * (1 - b + b * lengths[position] / average_length)
+                scores[position] = scores.get(position, 0.0) + idf * (k1 + 1) * (
+                    frequency / (frequency + norm)
+                )
+    return sorted(scores.items(), key=lambda result: (-result[1], result[0]))[:k]
+
+
+def test_search_matches_exhaustive_bm25():
+    random = Random(7)
+    # Skewed word frequencies give terms with very different score bounds, so
+    # that the rare terms are only looked up for some documents.
+    words = ["salt", "boil", "water", "stir", "pepper", "oil", "pan", "dill"]
+    weights = [40, 20, 12, 8, 4, 2, 1, 1]
+    instructions = [
+        " ".join(random.choices(words, weights, k=random.randrange(1, 30)))
+        for _ in range(1500)
+    ]
+    index = InstructionIndex.build(instructions, stop_words=())
+    for _ in range(200):
+        query = " ".join(random.sample(words, random.randrange(1, 5)))
+        k = random.choice([1, 3, 10])
+        result = index.search(query, k=k)
+        expected = _exhaustive_search(instructions, query, k)
+        # Documents with the same score may come in any order.
+        assert [score for _, score in result] == pytest.approx(
+            [score for _, score in expected]
+        )
+        scores = dict(_exhaustive_search(instructions, query, len(instructions)))
+        for position, score in result:
+            assert scores[position] == pytest.approx(score)
+
+
+def test_search_instructions(recipe_book, index):
+    assert recipe_book.search_instructions(index, "Fry batter") == [
+        recipe_book.recipes[0]
+    ]
+
+
+def test_save_and_load(index, tmp_path):
+    path = tmp_path / "instructions.idx"
+    index.save(path)
+    with InstructionIndex.load(path) as loaded_index:
+        assert len(loaded_index) == 3
+        assert loaded_index.postings("boil") == index.postings("boil")
+        assert loaded_index.search("boil water tea") == index.search("boil water tea")
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "not_an_index"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        InstructionIndex.load(path)
@@ -1,4 +1,4 @@
-﻿from recipes import Recipe, RecipeBook
+﻿from recipes import DuplicateNamePolicy, Recipe, RecipeBook
 import pytest
 
 
@@ -43,12 +43,68 @@ def test_get_recipe_by_name(recipe1, recipe2, recipe_book):
         recipe_book.get_recipe_by_name("nonexistent")
 
 
+def test_get_recipe_by_name_with_duplicate_names(recipe1, recipe2):
+    renamed_recipe2 = Recipe("My Recipe", recipe2.ingredients, recipe2.instructions)
+    keep_first_book = RecipeBook([recipe1])
+    keep_first_book.add_recipe(renamed_recipe2)
+    assert keep_first_book.get_recipe_by_name("My Recipe") == recipe1
+
+    keep_last_book = RecipeBook([recipe1], DuplicateNamePolicy.KEEP_LAST)
+    keep_last_book.add_recipe(renamed_recipe2)
+    assert keep_last_book.get_recipe_by_name("My Recipe") == renamed_recipe2
+    assert keep_last_book.recipes == [recipe1, renamed_recipe2]
+
+
+def test_add_recipe_with_duplicate_name_raises(recipe1, recipe2):
+    renamed_recipe2 = Recipe("My Recipe", recipe2.ingredients, recipe2.instructions)
+    recipe_book = RecipeBook([recipe1], DuplicateNamePolicy.RAISE)
+    with pytest.raises(ValueError):
+        recipe_book.add_recipe(renamed_recipe2)
+    assert recipe_book.recipes == [recipe1]
+    with pytest.raises(ValueError):
+        RecipeBook([recipe1, renamed_recipe2], DuplicateNamePolicy.RAISE)
+
+
 def test_get_recipes_with_ingredient(recipe1, recipe2, recipe_book):
     assert recipe_book.get_recipes_with_ingredient("ingredient 1") == [recipe1, recipe2]
     assert recipe_book.get_recipes_with_ingredient("my ingredient 2") == [recipe1]
     assert recipe_book.get_recipes_with_ingredient("nonexistent") == []
 
 
+def test_get_recipes_with_ingredient_after_add_recipe(recipe1, recipe2):
+    recipe_book = RecipeBook()
+    recipe_book.add_recipe(recipe2)
+    recipe_book.add_recipe(recipe1)
+    assert recipe_book.get_recipes_with_ingredient("ingredient 1") == [recipe2, recipe1]
+    assert recipe_book.get_recipes_with_ingredient("my ingredient 2") == [recipe1]
+
+
+def test_get_recipes_with_all_ingredients(recipe1, recipe2, recipe_book):
+    assert recipe_book.get_recipes_with_all_ingredients(
+        ["ingredient 1", "my ingredient 2"]
+    ) == [recipe1]
+    assert recipe_book.get_recipes_with_all_ingredients(["ingredient 1"]) == [
+        recipe1,
+        recipe2,
+    ]
+    assert (
+        recipe_book.get_recipes_with_all_ingredients(
+            ["my ingredient 2", "your ingredient 2"]
+        )
+        == []
+    )
+    assert recipe_book.get_recipes_with_all_ingredients([]) == [recipe1, recipe2]
+
+
+def test_get_recipes_with_any_ingredient(recipe1, recipe2, recipe_book):
+    assert recipe_book.get_recipes_with_any_ingredient(
+        ["your ingredient 2", "my ingredient 2"]
+    ) == [recipe1, recipe2]
+    assert recipe_book.get_recipes_with_any_ingredient(["my ingredient 2"]) == [recipe1]
+    assert recipe_book.get_recipes_with_any_ingredient(["nonexistent"]) == []
+    assert recipe_book.get_recipes_with_any_ingredient([]) == []
+
+
 def test_get_recipes_by_rating(recipe1, recipe2, recipe_book):
     assert recipe_book.get_recipes_by_rating(4) == [recipe1]
     assert recipe_book.get_recipes_by_rating(5) == [recipe2]
@@ -60,3 +116,28 @@ def test_get_recipes_above_rating(recipe1, recipe2, recipe_book):
     assert recipe_book.get_recipes_above_rating(4) == [recipe1, recipe2]
     assert recipe_book.get_recipes_above_rating(5) == [recipe2]
     assert recipe_book.get_recipes_above_rating(6) == []
+
+
+def test_get_recipes_above_rating_includes_unrated_recipes(recipe1, recipe2):
+    unrated_recipe = Recipe("Unrated Recipe", ["ingredient 1"], "Instructions\n...")
+    recipe_book = RecipeBook([recipe2, unrated_recipe])
+    recipe_book.add_recipe(recipe1)
+    assert recipe_book.get_recipes_above_rating(5) == [recipe2, unrated_recipe]
+    assert recipe_book.get_recipes_above_rating(4) == [
+        recipe2,
+        unrated_recipe,
+        recipe1,
+    ]
+    assert recipe_book.get_recipes_by_rating(None) == [unrated_recipe]
+
+
+def test_iter_recipes_above_rating(recipe1, recipe2):
+    recipe_book = RecipeBook([recipe1, recipe2] * 3)
+    assert list(recipe_book.iter_recipes_above_rating(4, page_size=4)) == [
+        [recipe1, recipe2, recipe1, recipe2],
+        [recipe1, recipe2],
+    ]
+    assert list(recipe_book.iter_recipes_above_rating(5, page_size=4)) == [
+        [recipe2, recipe2, recipe2]
+    ]
+    assert list(recipe_book.iter_recipes_above_rating(6)) == []
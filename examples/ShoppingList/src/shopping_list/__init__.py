@@ -1 +1,10 @@
-from .shopping_list import ShoppingListItem, ShoppingList
+from .shopping_list import (
+    ShoppingListItem,
+    ShoppingList,
+    ImportStats,
+    format_cents,
+    parse_cents,
+    to_cents,
+)
+from .columnar_shopping_list import ColumnarShoppingList
+from .concurrent_shopping_list import ConcurrentShoppingList
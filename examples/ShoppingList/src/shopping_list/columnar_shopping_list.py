@@ -0,0 +1,186 @@
+from array import array
+from operator import mul
+from typing import Iterable, Iterator
+
+from .shopping_list import FileIOMixin, ReceiptMixin, ShoppingListItem, to_cents
+
+
+class ColumnarShoppingList(ReceiptMixin, FileIOMixin):
+    """A shopping list for very large numbers of items.
+
+    The list has the same interface as `ShoppingList`, but stores its items in
+    columns: product names are stored once and referenced by number, prices and
+    amounts are stored in arrays of machine numbers. Items are created when they are
+    accessed.
+
+    >>> sl = ColumnarShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)])
+    >>> sl
+    ColumnarShoppingList(items=[ShoppingListItem(product='Tea', price=2.5, amount=1),
+                                ShoppingListItem(product='Coffee', price=7.0, amount=2)])
+    >>> sl.total_price()
+    16.5
+    """
+
+    def __init__(self, items: Iterable[ShoppingListItem] = (), in_cents: bool = False):
+        self.in_cents = in_cents
+        self._product_names: list[str] = []
+        self._product_ids: dict[str, int] = {}
+        self._products = array("i")
+        self._prices = array("q" if in_cents else "d")
+        self._amounts = array("q")
+        self._total_cents = 0
+        # The indices are only built when they are needed, so that loading a list
+        # does not pay for them.
+        self._row_by_product_and_price: dict[tuple[int, float], int] | None = None
+        self._rows_by_product: dict[int, list[int]] | None = None
+        for item in items:
+            self._append(item.product, item.price, item.amount)
+
+    @staticmethod
+    def from_item_values(
+        item_values: Iterable[tuple[str, float] | tuple[str, float, int]],
+        in_cents: bool = False,
+    ):
+        """Create a shopping list by loading item values directly into the columns.
+
+        >>> sl = ColumnarShoppingList.from_item_values([("Tea", 2.5)], in_cents=True)
+        >>> sl[0]
+        ShoppingListItem(product='Tea', price=250, amount=1)
+        """
+        result = ColumnarShoppingList(in_cents=in_cents)
+        for product, price, *amount in item_values:
+            if in_cents:
+                price = to_cents(price)
+            result._append(product, price, *amount)
+        return result
+
+    @property
+    def items(self) -> list[ShoppingListItem]:
+        return list(self)
+
+    def __iter__(self) -> Iterator[ShoppingListItem]:
+        return map(self._item, range(len(self)))
+
+    def __len__(self):
+        return len(self._amounts)
+
+    def __eq__(self, other):
+        if not isinstance(other, ColumnarShoppingList):
+            return NotImplemented
+        return self.in_cents == other.in_cents and self.items == other.items
+
+    def __repr__(self):
+        in_cents = ", in_cents=True" if self.in_cents else ""
+        return f"ColumnarShoppingList(items={self.items!r}{in_cents})"
+
+    def __getitem__(self, n):
+        """Return an item, either by index or product name.
+
+        >>> sl = ColumnarShoppingList.from_item_values(
+        ...          [("Tea", 2.5), ("Coffee", 7.0, 2), ("Tea", 3.5)])
+        >>> sl[-1]
+        ShoppingListItem(product='Tea', price=3.5, amount=1)
+        >>> sl["Tea"]
+        [ShoppingListItem(product='Tea', price=2.5, amount=1),
+         ShoppingListItem(product='Tea', price=3.5, amount=1)]
+        """
+        if isinstance(n, str):
+            return self.find_by_product_name(n)
+        rows = range(len(self))[n]
+        if isinstance(rows, range):
+            return [self._item(row) for row in rows]
+        return self._item(rows)
+
+    def find_by_product_name(self, product: str) -> list[ShoppingListItem]:
+        product_id = self._product_ids.get(product)
+        if product_id is None:
+            return []
+        return [self._item(row) for row in self._product_rows().get(product_id, [])]
+
+    def add_item(self, item: ShoppingListItem):
+        """Add an item to a shopping list.
+
+        If an item with the same product name and price already exists, the amount
+        is increased instead of adding a new item. If the list is `in_cents`, the
+        price of `item` has to be an integer number of cents.
+
+        >>> sl = ColumnarShoppingList()
+        >>> sl.add_item(ShoppingListItem("Tea", 2.5))
+        >>> sl.add_item(ShoppingListItem("Coffee", 7.0, 2))
+        >>> sl.add_item(ShoppingListItem("Tea", 2.5))
+        >>> sl
+        ColumnarShoppingList(items=[ShoppingListItem(product='Tea', price=2.5, amount=2),
+                                    ShoppingListItem(product='Coffee', price=7.0, amount=2)])
+        """
+        # Check the price before the lookup, since a float price would find the
+        # row of the equal integer price and bypass the check of the price column.
+        if self.in_cents and not isinstance(item.price, int):
+            raise TypeError(f"Price of {item.product} is not in cents.")
+        product_id = self._product_ids.get(item.product)
+        if product_id is not None:
+            row = self._product_and_price_rows().get((product_id, item.price))
+            if row is not None:
+                self._amounts[row] += item.amount
+                if self.in_cents:
+                    self._total_cents += item.price * item.amount
+                return
+        self._append(item.product, item.price, item.amount)
+
+    def total_price(self):
+        """Return the total price of a shopping list.
+
+        >>> ColumnarShoppingList().total_price()
+        0
+        >>> ColumnarShoppingList.from_item_values(
+        ...     [("Tea", 0.1)] * 3, in_cents=True).total_price()
+        30
+        """
+        if self.in_cents:
+            return self._total_cents
+        return round(sum(map(mul, self._prices, self._amounts)), 2)
+
+    def _item(self, row: int) -> ShoppingListItem:
+        return ShoppingListItem(
+            self._product_names[self._products[row]],
+            self._prices[row],
+            self._amounts[row],
+        )
+
+    def _append(self, product: str, price: float, amount: int = 1):
+        # The arrays reject values of the wrong type, e.g., float prices for a list
+        # in cents. Append these values first to keep the columns consistent.
+        self._prices.append(price)
+        try:
+            self._amounts.append(amount)
+        except TypeError:
+            self._prices.pop()
+            raise
+        product_id = self._product_ids.get(product)
+        if product_id is None:
+            product_id = len(self._product_names)
+            self._product_ids[product] = product_id
+            self._product_names.append(product)
+        row = len(self._products)
+        self._products.append(product_id)
+        if self.in_cents:
+            self._total_cents += price * amount
+        if self._row_by_product_and_price is not None:
+            self._row_by_product_and_price.setdefault((product_id, price), row)
+        if self._rows_by_product is not None:
+            self._rows_by_product.setdefault(product_id, []).append(row)
+
+    def _product_and_price_rows(self) -> dict[tuple[int, float], int]:
+        if self._row_by_product_and_price is None:
+            index: dict[tuple[int, float], int] = {}
+            for row, key in enumerate(zip(self._products, self._prices)):
+                index.setdefault(key, row)
+            self._row_by_product_and_price = index
+        return self._row_by_product_and_price
+
+    def _product_rows(self) -> dict[int, list[int]]:
+        if self._rows_by_product is None:
+            index: dict[int, list[int]] = {}
+            for row, product_id in enumerate(self._products):
+                index.setdefault(product_id, []).append(row)
+            self._rows_by_product = index
+        return self._rows_by_product
@@ -0,0 +1,205 @@
+from operator import itemgetter
+from threading import Lock
+from typing import Iterable, Iterator, Sequence
+
+from .shopping_list import FileIOMixin, ReceiptMixin, ShoppingListItem, to_cents
+
+
+class _Entry:
+    """The stored values of an item, whose amount is increased by merges."""
+
+    __slots__ = ("product", "price", "amount")
+
+    def __init__(self, item: ShoppingListItem):
+        self.product = item.product
+        self.price = item.price
+        self.amount = item.amount
+
+    def item(self) -> ShoppingListItem:
+        return ShoppingListItem(self.product, self.price, self.amount)
+
+
+class _Shard:
+    """The part of the product index for the products with the same hash bucket."""
+
+    __slots__ = ("lock", "entries_by_product_and_price", "entries_by_product", "total")
+
+    def __init__(self):
+        self.lock = Lock()
+        self.entries_by_product_and_price: dict[tuple[str, float], _Entry] = {}
+        self.entries_by_product: dict[str, list[_Entry]] = {}
+        self.total = 0
+
+
+class ConcurrentShoppingList(ReceiptMixin, FileIOMixin):
+    """A shopping list that can be modified by many threads at the same time.
+
+    The index of the items is split into `num_shards` shards, each protected by its
+    own lock, so that threads adding different products rarely wait for each other.
+    Adding many items with a single call to `add_items()` acquires each lock only
+    once per call. Only new items take a lock shared by all threads.
+
+    The shards only pay off if threads run in parallel, i.e., in free-threaded
+    builds of Python. With the GIL, the throughput does not grow with the number of
+    threads; batches are added about as fast as with a single lock around a
+    `ShoppingList`.
+
+    Items are ordered by the time they were first added; the items of a batch keep
+    their order. The list stores the values of the added items and hands out new,
+    immutable items, so that the index and the total always match the items.
+
+    >>> sl = ConcurrentShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)])
+    >>> sl.add_items([ShoppingListItem("Tea", 2.5), ShoppingListItem("Milk", 1.0)])
+    >>> sl
+    ConcurrentShoppingList(items=[ShoppingListItem(product='Tea', price=2.5, amount=2),
+                                  ShoppingListItem(product='Coffee', price=7.0, amount=2),
+                                  ShoppingListItem(product='Milk', price=1.0, amount=1)])
+    """
+
+    def __init__(
+        self,
+        items: Iterable[ShoppingListItem] = (),
+        in_cents: bool = False,
+        num_shards: int = 16,
+    ):
+        self.in_cents = in_cents
+        self._shards = [_Shard() for _ in range(num_shards)]
+        self._entries: list[_Entry] = []
+        self._entries_lock = Lock()
+        for item in items:
+            shard = self._shard(item.product)
+            self._check_price(item)
+            entry = _Entry(item)
+            self._index_new_entry(shard, entry)
+            self._entries.append(entry)
+
+    @staticmethod
+    def from_item_values(
+        item_values: Sequence[tuple[str, float] | tuple[str, float, int]],
+        in_cents: bool = False,
+    ):
+        """Create a shopping list from item values.
+
+        >>> ConcurrentShoppingList.from_item_values([("Tea", 2.5)], in_cents=True)
+        ConcurrentShoppingList(items=[ShoppingListItem(product='Tea', price=250, amount=1)],
+                               in_cents=True)
+        """
+        if in_cents:
+            items = [
+                ShoppingListItem(product, to_cents(price), *amount)
+                for product, price, *amount in item_values
+            ]
+        else:
+            items = [ShoppingListItem(*values) for values in item_values]
+        return ConcurrentShoppingList(items, in_cents=in_cents)
+
+    @property
+    def items(self) -> list[ShoppingListItem]:
+        with self._entries_lock:
+            return [entry.item() for entry in self._entries]
+
+    def __iter__(self) -> Iterator[ShoppingListItem]:
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __eq__(self, other):
+        if not isinstance(other, ConcurrentShoppingList):
+            return NotImplemented
+        return self.in_cents == other.in_cents and self.items == other.items
+
+    def __repr__(self):
+        in_cents = ", in_cents=True" if self.in_cents else ""
+        return f"ConcurrentShoppingList(items={self.items!r}{in_cents})"
+
+    def __getitem__(self, n):
+        if isinstance(n, str):
+            return self.find_by_product_name(n)
+        with self._entries_lock:
+            if isinstance(n, slice):
+                return [entry.item() for entry in self._entries[n]]
+            return self._entries[n].item()
+
+    def find_by_product_name(self, product: str) -> list[ShoppingListItem]:
+        shard = self._shard(product)
+        with shard.lock:
+            return [entry.item() for entry in shard.entries_by_product.get(product, [])]
+
+    def add_item(self, item: ShoppingListItem):
+        """Add an item to a shopping list.
+
+        If an item with the same product name and price already exists, the amount
+        is increased instead of adding a new item.
+        """
+        self.add_items([item])
+
+    def add_items(self, items: Iterable[ShoppingListItem]):
+        """Add a batch of items to a shopping list.
+
+        The result is the same as adding the items one by one with `add_item()`.
+        """
+        num_shards = len(self._shards)
+        items_by_shard: dict[int, list[tuple[int, ShoppingListItem]]] = {}
+        for position, item in enumerate(items):
+            self._check_price(item)
+            shard_index = hash(item.product) % num_shards
+            shard_items = items_by_shard.get(shard_index)
+            if shard_items is None:
+                items_by_shard[shard_index] = [(position, item)]
+            else:
+                shard_items.append((position, item))
+        new_entries: list[tuple[int, _Entry]] = []
+        for shard_index, shard_items in items_by_shard.items():
+            shard = self._shards[shard_index]
+            entries_by_product_and_price = shard.entries_by_product_and_price
+            added_cents = 0
+            with shard.lock:
+                for position, item in shard_items:
+                    key = (item.product, item.price)
+                    entry = entries_by_product_and_price.get(key)
+                    if entry is None:
+                        entry = _Entry(item)
+                        entries_by_product_and_price[key] = entry
+                        shard.entries_by_product.setdefault(item.product, []).append(
+                            entry
+                        )
+                        new_entries.append((position, entry))
+                    else:
+                        entry.amount += item.amount
+                    if self.in_cents:
+                        added_cents += item.price * item.amount
+                shard.total += added_cents
+        if new_entries:
+            new_entries.sort(key=itemgetter(0))
+            with self._entries_lock:
+                self._entries.extend(entry for _, entry in new_entries)
+
+    def total_price(self):
+        """Return the total price of a shopping list.
+
+        >>> ConcurrentShoppingList.from_item_values(
+        ...     [("Tea", 0.1)] * 3, in_cents=True).total_price()
+        30
+        """
+        if self.in_cents:
+            return sum(shard.total for shard in self._shards)
+        return round(sum(item.total_price() for item in self.items), 2)
+
+    def _shard_index(self, product: str) -> int:
+        return hash(product) % len(self._shards)
+
+    def _shard(self, product: str) -> _Shard:
+        return self._shards[self._shard_index(product)]
+
+    def _check_price(self, item: ShoppingListItem):
+        if self.in_cents and not isinstance(item.price, int):
+            raise TypeError(f"Price of {item.product} is not in cents.")
+
+    def _index_new_entry(self, shard: _Shard, entry: _Entry):
+        shard.entries_by_product_and_price.setdefault(
+            (entry.product, entry.price), entry
+        )
+        shard.entries_by_product.setdefault(entry.product, []).append(entry)
+        if self.in_cents:
+            shard.total += entry.price * entry.amount
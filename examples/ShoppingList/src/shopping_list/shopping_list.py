@@ -1,8 +1,53 @@
-from dataclasses import dataclass, field  # noqa
-from typing import Sequence
+import csv
+import json
+import time
+from dataclasses import dataclass, field, replace  # noqa
+from typing import Any, Callable, Iterable, Iterator, Sequence, TextIO
 
 
-@dataclass
+def to_cents(price: float) -> int:
+    """Convert a price into an integer number of cents.
+
+    >>> to_cents(2.5)
+    250
+    >>> to_cents(0.29)
+    29
+    """
+    return round(price * 100)
+
+
+def format_cents(cents: int) -> str:
+    """Format an integer number of cents as price.
+
+    >>> format_cents(250)
+    '2.50'
+    >>> format_cents(-5)
+    '-0.05'
+    """
+    sign = "-" if cents < 0 else ""
+    euros, cents = divmod(abs(cents), 100)
+    return f"{sign}{euros}.{cents:02}"
+
+
+def parse_cents(text: str) -> int:
+    """Convert a price written in decimal notation into cents without rounding errors.
+
+    >>> parse_cents("2.5")
+    250
+    >>> parse_cents("-0.05")
+    -5
+    >>> parse_cents("1e1")
+    1000
+    """
+    euros, _, cents = text.strip().partition(".")
+    digits = euros[1:] if euros[:1] in ("+", "-") else euros
+    if digits.isdecimal() and len(cents) <= 2 and (cents == "" or cents.isdecimal()):
+        sign = -1 if euros.startswith("-") else 1
+        return sign * (abs(int(euros)) * 100 + int(cents.ljust(2, "0")))
+    return to_cents(float(text))
+
+
+@dataclass(frozen=True)
 class ShoppingListItem:
     product: str
     price: float
@@ -19,13 +64,280 @@ class ShoppingListItem:
         return self.price * self.amount
 
 
+class _ItemsView(Sequence[ShoppingListItem]):
+    """A read-only view of the items of a shopping list.
+
+    The view does not copy the items and compares equal to lists and tuples with the
+    same items.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: list[ShoppingListItem]):
+        self._items = items
+
+    def __getitem__(self, n):
+        return self._items[n]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[ShoppingListItem]:
+        return iter(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, _ItemsView):
+            return self._items == other._items
+        if isinstance(other, (list, tuple)):
+            return self._items == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self._items)
+
+
+class ReceiptMixin:
+    """Rendering of shopping lists as receipts.
+
+    Classes using this mixin have to be iterable over their items and provide
+    `total_price()` and `in_cents`. The receipt is produced line by line, so even
+    very large lists can be written without building the whole receipt in memory.
+    """
+
+    in_cents: bool
+
+    def __str__(self):
+        """Convert a shopping list into a string.
+
+        >>> print(ShoppingList().from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)]))
+        Shopping List
+          1 x Tea à 2.5 = 2.5
+          2 x Coffee à 7.0 = 14.0
+        Total: 16.5
+        >>> print(ShoppingList.from_item_values([("Tea", 2.5)], in_cents=True))
+        Shopping List
+          1 x Tea à 2.50 = 2.50
+        Total: 2.50
+        """
+        return "\n".join(self.iter_lines())
+
+    def iter_lines(self) -> Iterator[str]:
+        """Return the lines of the receipt for a shopping list.
+
+        >>> list(ShoppingList.from_item_values([("Tea", 2.5)]).iter_lines())
+        ['Shopping List', '  1 x Tea à 2.5 = 2.5', 'Total: 2.5']
+        """
+        yield "Shopping List"
+        for item in self:
+            yield (
+                f"  {item.amount} x {item.product} à {self._format_price(item.price)}"
+                f" = {self._format_price(item.total_price())}"
+            )
+        yield f"Total: {self._format_price(self.total_price())}"
+
+    def render(self, stream: TextIO):
+        """Write the receipt for a shopping list to `stream`, one line at a time.
+
+        >>> import sys
+        >>> ShoppingList.from_item_values([("Tea", 2.5)]).render(sys.stdout)
+        Shopping List
+          1 x Tea à 2.5 = 2.5
+        Total: 2.5
+        """
+        for line in self.iter_lines():
+            stream.write(line)
+            stream.write("\n")
+
+    def _format_price(self, price):
+        return format_cents(price) if self.in_cents else price
+
+
 @dataclass
-class ShoppingList:
-    items: list[ShoppingListItem] = field(default_factory=list)
+class ImportStats:
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+ProgressCallback = Callable[[ImportStats], None]
+
+
+class FileIOMixin:
+    """Streaming import and export of shopping lists as CSV and JSON Lines.
+
+    Rows are read one at a time and added with `add_item()`, so rows with the same
+    product and price are merged while the file is read. CSV files start with a
+    header row containing the columns `product`, `price` and (optionally) `amount`.
+    """
+
+    in_cents: bool
+
+    @classmethod
+    def from_csv(cls, stream: Iterable[str], in_cents: bool = False):
+        """Create a shopping list from a CSV file.
+
+        >>> ShoppingList.from_csv(["product,price,amount", "Tea,2.5,1", "Tea,2.5,2"])
+        ShoppingList(items=[ShoppingListItem(product='Tea', price=2.5, amount=3)])
+        """
+        result = cls(in_cents=in_cents)
+        result.load_csv(stream)
+        return result
+
+    @classmethod
+    def from_jsonl(cls, stream: Iterable[str], in_cents: bool = False):
+        """Create a shopping list from a JSON Lines file.
+
+        >>> ShoppingList.from_jsonl(['{"product": "Tea", "price": 2.5}'])
+        ShoppingList(items=[ShoppingListItem(product='Tea', price=2.5, amount=1)])
+        """
+        result = cls(in_cents=in_cents)
+        result.load_jsonl(stream)
+        return result
+
+    def load_csv(
+        self,
+        stream: Iterable[str],
+        progress: ProgressCallback | None = None,
+        progress_interval: int = 100_000,
+    ) -> ImportStats:
+        """Add the items in a CSV file to a shopping list.
+
+        If `progress` is given, it is called every `progress_interval` rows.
+        """
+        rows = csv.reader(stream)
+        header = next(rows, None)
+        if header is None:
+            return ImportStats()
+        columns = {name.strip(): index for index, name in enumerate(header)}
+        product_index, price_index = columns["product"], columns["price"]
+        amount_index = columns.get("amount")
+        values = (
+            (
+                row[product_index],
+                row[price_index],
+                1 if amount_index is None else int(row[amount_index]),
+            )
+            for row in rows
+            if row
+        )
+        return self._load_values(values, progress, progress_interval)
+
+    def load_jsonl(
+        self,
+        stream: Iterable[str],
+        progress: ProgressCallback | None = None,
+        progress_interval: int = 100_000,
+    ) -> ImportStats:
+        """Add the items in a JSON Lines file to a shopping list.
+
+        Each line contains an object with the keys `product`, `price` and
+        (optionally) `amount`. If `progress` is given, it is called every
+        `progress_interval` rows.
+        """
+        # Numbers are parsed as strings, so that prices can be converted to cents
+        # without rounding errors.
+        records = (
+            json.loads(line, parse_float=str, parse_int=str)
+            for line in stream
+            if line.strip()
+        )
+        values = (
+            (record["product"], record["price"], int(record.get("amount", 1)))
+            for record in records
+        )
+        return self._load_values(values, progress, progress_interval)
+
+    def _load_values(
+        self,
+        values: Iterable[tuple[str, Any, int]],
+        progress: ProgressCallback | None,
+        progress_interval: int,
+    ) -> ImportStats:
+        parse_price = parse_cents if self.in_cents else float
+        stats = ImportStats()
+        start_time = time.perf_counter()
+        for product, price, amount in values:
+            self.add_item(ShoppingListItem(product, parse_price(price), amount))
+            stats.rows += 1
+            if progress is not None and stats.rows % progress_interval == 0:
+                stats.seconds = time.perf_counter() - start_time
+                progress(stats)
+        stats.seconds = time.perf_counter() - start_time
+        return stats
+
+    def to_csv(self, stream: TextIO):
+        """Write a shopping list as CSV file.
+
+        >>> import sys
+        >>> ShoppingList.from_item_values([("Tea", 2.5)], in_cents=True).to_csv(sys.stdout)
+        product,price,amount
+        Tea,2.50,1
+        """
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(["product", "price", "amount"])
+        for item in self:
+            writer.writerow(
+                [item.product, self._format_file_price(item.price), item.amount]
+            )
+
+    def to_jsonl(self, stream: TextIO):
+        """Write a shopping list as JSON Lines file.
+
+        >>> import sys
+        >>> ShoppingList.from_item_values([("Tea", 2.5)], in_cents=True).to_jsonl(sys.stdout)
+        {"product": "Tea", "price": 2.50, "amount": 1}
+        """
+        for item in self:
+            stream.write(
+                f'{{"product": {json.dumps(item.product)}, '
+                f'"price": {self._format_file_price(item.price)}, '
+                f'"amount": {item.amount}}}\n'
+            )
+
+    def _format_file_price(self, price) -> str:
+        return format_cents(price) if self.in_cents else repr(price)
+
+
+class ShoppingList(ReceiptMixin, FileIOMixin):
+    """A shopping list.
+
+    The items are indexed by product and by product and price, so that adding an
+    item or finding the items of a product does not scan the list. To keep the
+    indices consistent, the list is only changed with `add_item()`: items are
+    immutable and `items` is a read-only view.
+
+    >>> sl = ShoppingList.from_item_values([("Tea", 2.5)])
+    >>> sl[0].amount = 3
+    Traceback (most recent call last):
+    ...
+    dataclasses.FrozenInstanceError: cannot assign to field 'amount'
+    >>> sl.items.append(ShoppingListItem("Coffee", 7.0))
+    Traceback (most recent call last):
+    ...
+    AttributeError: '_ItemsView' object has no attribute 'append'
+    """
+
+    def __init__(self, items: Iterable[ShoppingListItem] = (), in_cents: bool = False):
+        # If `in_cents` is true, the prices of all items are integer numbers of cents
+        # and prices are computed exactly.
+        self.in_cents = in_cents
+        self._items: list[ShoppingListItem] = []
+        # Indices holding the positions of the items in `_items`. They are updated by
+        # all methods that modify `_items`.
+        self._position_by_product_and_price: dict[tuple[str, float], int] = {}
+        self._positions_by_product: dict[str, list[int]] = {}
+        self._total_cents = 0
+        for item in items:
+            self._add_to_total(item)
+            self._append(item)
 
     @staticmethod
     def from_item_values(
-        item_values: Sequence[tuple[str, float] | tuple[str, float, int]]
+        item_values: Sequence[tuple[str, float] | tuple[str, float, int]],
+        in_cents: bool = False,
     ):
         """Create a shopping list from item values.
 
@@ -34,27 +346,27 @@ class ShoppingList:
         >>> ShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)])
         ShoppingList(items=[ShoppingListItem(product='Tea', price=2.5, amount=1),\
                             ShoppingListItem(product='Coffee', price=7.0, amount=2)])
+
+        If `in_cents` is true, the prices are converted into integer cents.
+        >>> ShoppingList.from_item_values([("Tea", 2.5)], in_cents=True)
+        ShoppingList(items=[ShoppingListItem(product='Tea', price=250, amount=1)],
+                     in_cents=True)
         """
-        items = [ShoppingListItem(*values) for values in item_values]
-        return ShoppingList(items)
+        if in_cents:
+            items = [
+                ShoppingListItem(product, to_cents(price), *amount)
+                for product, price, *amount in item_values
+            ]
+        else:
+            items = [ShoppingListItem(*values) for values in item_values]
+        return ShoppingList(items, in_cents=in_cents)
 
-    def __str__(self):
-        """Convert a shopping list into a string.
+    @property
+    def items(self) -> Sequence[ShoppingListItem]:
+        return _ItemsView(self._items)
 
-        >>> print(ShoppingList().from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)]))
-        Shopping List
-          1 x Tea à 2.5 = 2.5
-          2 x Coffee à 7.0 = 14.0
-        Total: 16.5
-        """
-        result = f"Shopping List\n"
-        for item in self.items:
-            result += (
-                f"  {item.amount} x {item.product} à {item.price}"
-                f" = {item.total_price()}\n"
-            )
-        result += f"Total: {self.total_price()}"
-        return result
+    def __iter__(self) -> Iterator[ShoppingListItem]:
+        return iter(self._items)
 
     def __len__(self):
         """Return the number of items in a shopping list.
@@ -64,7 +376,16 @@ class ShoppingList:
         >>> len(ShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)]))
         2
         """
-        return len(self.items)
+        return len(self._items)
+
+    def __eq__(self, other):
+        if not isinstance(other, ShoppingList):
+            return NotImplemented
+        return self.in_cents == other.in_cents and self._items == other._items
+
+    def __repr__(self):
+        in_cents = ", in_cents=True" if self.in_cents else ""
+        return f"ShoppingList(items={self.items!r}{in_cents})"
 
     def __getitem__(self, n):
         """Return an item, either by index or product name.
@@ -84,7 +405,7 @@ class ShoppingList:
 
         if isinstance(n, str):
             return self.find_by_product_name(n)
-        return self.items[n]
+        return self._items[n]
 
     def find_by_product_name(self, product: str):
         """Find items given their product name.
@@ -97,13 +418,17 @@ class ShoppingList:
         >>> sl.find_by_product_name("Coffee")
         [ShoppingListItem(product='Coffee', price=7.0, amount=2)]
         """
-        return [item for item in self.items if item.product == product]
+        return [
+            self._items[position]
+            for position in self._positions_by_product.get(product, [])
+        ]
 
     def add_item(self, item: ShoppingListItem):
         """Add an item to a shopping list.
 
         If an item with the same product name and price already exists, the amount
-        is increased instead of adding a new item.
+        is increased instead of adding a new item. If the list is `in_cents`, the
+        price of `item` has to be an integer number of cents.
 
         >>> sl = ShoppingList()
         >>> sl.add_item(ShoppingListItem("Tea", 2.5))
@@ -115,14 +440,29 @@ class ShoppingList:
                             ShoppingListItem(product='Coffee', price=7.0, amount=2),
                             ShoppingListItem(product='Tea', price=3.5, amount=1)])
         """
-        for existing_product in self.items:
-            if (
-                existing_product.product == item.product
-                and existing_product.price == item.price
-            ):
-                existing_product.amount += item.amount
-                return
-        self.items.append(item)
+        self._add_to_total(item)
+        position = self._position_by_product_and_price.get((item.product, item.price))
+        if position is not None:
+            existing_item = self._items[position]
+            self._items[position] = replace(
+                existing_item, amount=existing_item.amount + item.amount
+            )
+        else:
+            self._append(item)
+
+    def _append(self, item: ShoppingListItem):
+        position = len(self._items)
+        self._items.append(item)
+        self._position_by_product_and_price.setdefault(
+            (item.product, item.price), position
+        )
+        self._positions_by_product.setdefault(item.product, []).append(position)
+
+    def _add_to_total(self, item: ShoppingListItem):
+        if self.in_cents:
+            if not isinstance(item.price, int):
+                raise TypeError(f"Price of {item.product} is not in cents.")
+            self._total_cents += item.price * item.amount
 
     def total_price(self):
         """Return the total price of a shopping list.
@@ -131,5 +471,12 @@ class ShoppingList:
         0
         >>> ShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)]).total_price()
         16.5
+
+        If the list is `in_cents`, the total is an exact integer number of cents that
+        is updated whenever an item is added.
+        >>> ShoppingList.from_item_values([("Tea", 0.1)] * 3, in_cents=True).total_price()
+        30
         """
-        return round(sum(item.total_price() for item in self.items), 2)
+        if self.in_cents:
+            return self._total_cents
+        return round(sum(item.total_price() for item in self._items), 2)
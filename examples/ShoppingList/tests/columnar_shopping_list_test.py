@@ -0,0 +1,114 @@
+import io
+from dataclasses import FrozenInstanceError
+
+from shopping_list import ColumnarShoppingList, ShoppingList, ShoppingListItem
+import pytest
+
+
+@pytest.fixture
+def shopping_list():
+    return ColumnarShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)])
+
+
+def test_from_item_values(shopping_list):
+    assert shopping_list.items == [
+        ShoppingListItem("Tea", 2.5),
+        ShoppingListItem("Coffee", 7.0, 2),
+    ]
+
+
+def test_create_from_items():
+    items = [ShoppingListItem("Tea", 2.5), ShoppingListItem("Tea", 2.5)]
+    assert ColumnarShoppingList(items).items == items
+
+
+def test_str(shopping_list):
+    assert str(shopping_list) == (
+        "Shopping List\n"
+        "  1 x Tea à 2.5 = 2.5\n"
+        "  2 x Coffee à 7.0 = 14.0\n"
+        "Total: 16.5"
+    )
+
+
+def test_len(shopping_list):
+    assert len(shopping_list) == 2
+
+
+def test_getitem_with_int_index(shopping_list):
+    assert shopping_list[0] == ShoppingListItem("Tea", 2.5)
+    assert shopping_list[-1] == ShoppingListItem("Coffee", 7.0, 2)
+    assert shopping_list[:1] == [ShoppingListItem("Tea", 2.5)]
+    with pytest.raises(IndexError):
+        shopping_list[2]  # noqa
+
+
+def test_getitem_with_string_index(shopping_list):
+    assert shopping_list["Tea"] == [ShoppingListItem("Tea", 2.5)]
+    assert shopping_list["Water"] == []
+
+
+def test_add_item_merges_items_with_same_product_and_price(shopping_list):
+    shopping_list.add_item(ShoppingListItem("Tea", 2.5, 3))
+    shopping_list.add_item(ShoppingListItem("Tea", 3.5))
+    shopping_list.add_item(ShoppingListItem("Milk", 1.2))
+
+    assert shopping_list.items == [
+        ShoppingListItem("Tea", 2.5, 4),
+        ShoppingListItem("Coffee", 7.0, 2),
+        ShoppingListItem("Tea", 3.5),
+        ShoppingListItem("Milk", 1.2),
+    ]
+    assert shopping_list["Tea"] == [
+        ShoppingListItem("Tea", 2.5, 4),
+        ShoppingListItem("Tea", 3.5),
+    ]
+
+
+def test_items_cannot_be_modified(shopping_list):
+    with pytest.raises(FrozenInstanceError):
+        shopping_list[0].amount = 10
+    assert shopping_list[0].amount == 1
+
+
+def test_total_price_agrees_with_shopping_list():
+    item_values = [(f"Product {i % 97}", i / 10, i % 5 + 1) for i in range(1000)]
+
+    assert (
+        ColumnarShoppingList.from_item_values(item_values).total_price()
+        == ShoppingList.from_item_values(item_values).total_price()
+    )
+
+
+def test_in_cents():
+    sl = ColumnarShoppingList.from_item_values(
+        [("Tea", 2.5), ("Tea", 2.5)], in_cents=True
+    )
+    sl.add_item(ShoppingListItem("Tea", 250, 2))
+
+    assert sl.items == [ShoppingListItem("Tea", 250, 3), ShoppingListItem("Tea", 250)]
+    assert sl.total_price() == 1000
+    assert str(sl).endswith("Total: 10.00")
+
+
+def test_add_item_with_float_price_in_cents_raises_error():
+    sl = ColumnarShoppingList(in_cents=True)
+    with pytest.raises(TypeError):
+        sl.add_item(ShoppingListItem("Tea", 2.5))
+    assert len(sl) == 0
+
+
+def test_add_item_with_float_price_of_existing_item_in_cents_raises_error():
+    sl = ColumnarShoppingList.from_item_values([("Tea", 2.5)], in_cents=True)
+    with pytest.raises(TypeError):
+        sl.add_item(ShoppingListItem("Tea", 250.0))
+
+    assert sl.items == [ShoppingListItem("Tea", 250)]
+    assert sl.total_price() == 250
+    assert isinstance(sl.total_price(), int)
+
+
+def test_render(shopping_list):
+    stream = io.StringIO()
+    shopping_list.render(stream)
+    assert stream.getvalue() == str(shopping_list) + "\n"
@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+import random
+
+from shopping_list import ConcurrentShoppingList, ShoppingList, ShoppingListItem
+import pytest
+
+
+@pytest.fixture
+def shopping_list():
+    return ConcurrentShoppingList.from_item_values([("Tea", 2.5), ("Coffee", 7.0, 2)])
+
+
+def random_items(seed, num_items):
+    rng = random.Random(seed)
+    return [
+        ShoppingListItem(f"Product {rng.randrange(50)}", rng.randrange(1, 4), 1)
+        for _ in range(num_items)
+    ]
+
+
+def test_from_item_values(shopping_list):
+    assert shopping_list.items == [
+        ShoppingListItem("Tea", 2.5),
+        ShoppingListItem("Coffee", 7.0, 2),
+    ]
+
+
+def test_str(shopping_list):
+    assert str(shopping_list) == (
+        "Shopping List\n"
+        "  1 x Tea à 2.5 = 2.5\n"
+        "  2 x Coffee à 7.0 = 14.0\n"
+        "Total: 16.5"
+    )
+
+
+def test_getitem(shopping_list):
+    assert len(shopping_list) == 2
+    assert shopping_list[1] == ShoppingListItem("Coffee", 7.0, 2)
+    assert shopping_list["Tea"] == [ShoppingListItem("Tea", 2.5)]
+    assert shopping_list["Water"] == []
+
+
+def test_add_items_is_equivalent_to_add_item():
+    items = random_items(seed=1, num_items=500)
+    expected = ShoppingList()
+    for item in random_items(seed=1, num_items=500):
+        expected.add_item(item)
+
+    sl = ConcurrentShoppingList()
+    sl.add_items(items)
+
+    assert sl.items == expected.items
+    assert sl.total_price() == expected.total_price()
+
+
+def test_add_items_copies_the_items():
+    tea = ShoppingListItem("Tea", 2.5)
+    sl = ConcurrentShoppingList()
+    sl.add_items([tea, tea, tea])
+    sl.add_item(tea)
+
+    assert sl.items == [ShoppingListItem("Tea", 2.5, 4)]
+    assert tea == ShoppingListItem("Tea", 2.5)
+
+
+def test_returned_items_cannot_be_changed(shopping_list):
+    with pytest.raises(FrozenInstanceError):
+        shopping_list[0].amount = 100
+    with pytest.raises(FrozenInstanceError):
+        shopping_list["Coffee"][0].price = 1.0
+
+    assert shopping_list == ConcurrentShoppingList.from_item_values(
+        [("Tea", 2.5), ("Coffee", 7.0, 2)]
+    )
+    assert shopping_list.total_price() == 16.5
+
+
+def test_add_items_with_float_price_in_cents_raises_error():
+    sl = ConcurrentShoppingList(in_cents=True)
+    with pytest.raises(TypeError):
+        sl.add_items([ShoppingListItem("Tea", 250), ShoppingListItem("Tea", 2.5)])
+    assert len(sl) == 0
+
+
+def test_concurrent_writers_compute_correct_totals():
+    num_threads, batches_per_thread, batch_size = 8, 50, 100
+    sl = ConcurrentShoppingList(in_cents=True, num_shards=4)
+
+    def write_batches(seed):
+        for batch in range(batches_per_thread):
+            sl.add_items(random_items(seed * batches_per_thread + batch, batch_size))
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(write_batches, range(num_threads)))
+
+    all_items = [
+        item
+        for seed in range(num_threads * batches_per_thread)
+        for item in random_items(seed, batch_size)
+    ]
+    expected_amounts = {}
+    for item in all_items:
+        key = (item.product, item.price)
+        expected_amounts[key] = expected_amounts.get(key, 0) + item.amount
+
+    assert {(i.product, i.price): i.amount for i in sl.items} == expected_amounts
+    assert len(sl) == len(expected_amounts)
+    assert sl.total_price() == sum(item.price for item in all_items)
+    assert sl.total_price() == sum(item.total_price() for item in sl.items)
@@ -0,0 +1,93 @@
+import io
+
+from shopping_list import ColumnarShoppingList, ShoppingList, ShoppingListItem
+import pytest
+
+CSV_DATA = "product,price,amount\nTea,2.5,1\nCoffee,7.0,2\nTea,2.5,3\n"
+JSONL_DATA = (
+    '{"product": "Tea", "price": 2.5, "amount": 1}\n'
+    '{"product": "Coffee", "price": 7.0, "amount": 2}\n'
+    '{"product": "Tea", "price": 2.5, "amount": 3}\n'
+)
+
+
+@pytest.fixture(params=[ShoppingList, ColumnarShoppingList])
+def list_class(request):
+    return request.param
+
+
+def test_from_csv_merges_items(list_class):
+    sl = list_class.from_csv(io.StringIO(CSV_DATA))
+    assert sl.items == [
+        ShoppingListItem("Tea", 2.5, 4),
+        ShoppingListItem("Coffee", 7.0, 2),
+    ]
+
+
+def test_from_csv_without_amount_column(list_class):
+    sl = list_class.from_csv(io.StringIO("price,product\n1.5,Milk\n"))
+    assert sl.items == [ShoppingListItem("Milk", 1.5)]
+
+
+def test_from_empty_csv(list_class):
+    assert len(list_class.from_csv(io.StringIO(""))) == 0
+
+
+def test_from_jsonl_merges_items(list_class):
+    sl = list_class.from_jsonl(io.StringIO(JSONL_DATA))
+    assert sl.items == [
+        ShoppingListItem("Tea", 2.5, 4),
+        ShoppingListItem("Coffee", 7.0, 2),
+    ]
+
+
+def test_read_prices_in_cents_exactly(list_class):
+    sl = list_class.from_csv(
+        io.StringIO("product,price\nGum,0.1\nGum,0.1\nGum,0.1\n"), in_cents=True
+    )
+    assert sl.items == [ShoppingListItem("Gum", 10, 3)]
+    assert sl.total_price() == 30
+
+    sl = list_class.from_jsonl(
+        io.StringIO('{"product": "Gum", "price": 0.29}\n'), in_cents=True
+    )
+    assert sl.items == [ShoppingListItem("Gum", 29)]
+
+
+@pytest.mark.parametrize("in_cents", [False, True])
+def test_csv_round_trip(list_class, in_cents):
+    sl = list_class.from_item_values(
+        [("Tea, green", 2.5), ("Coffee", 7.0, 2)], in_cents=in_cents
+    )
+    stream = io.StringIO()
+    sl.to_csv(stream)
+    stream.seek(0)
+    assert list_class.from_csv(stream, in_cents=in_cents) == sl
+
+
+@pytest.mark.parametrize("in_cents", [False, True])
+def test_jsonl_round_trip(list_class, in_cents):
+    sl = list_class.from_item_values(
+        [('Tea "Earl Grey"', 2.5), ("Coffee", 7.0, 2)], in_cents=in_cents
+    )
+    stream = io.StringIO()
+    sl.to_jsonl(stream)
+    stream.seek(0)
+    assert list_class.from_jsonl(stream, in_cents=in_cents) == sl
+
+
+def test_load_csv_reports_progress(list_class):
+    rows = "".join(f"Product {i % 10},1.5,1\n" for i in range(25))
+    reported_rows = []
+    sl = list_class()
+
+    stats = sl.load_csv(
+        io.StringIO("product,price,amount\n" + rows),
+        progress=lambda s: reported_rows.append(s.rows),
+        progress_interval=10,
+    )
+
+    assert reported_rows == [10, 20]
+    assert stats.rows == 25
+    assert stats.rows_per_second > 0
+    assert len(sl) == 10
@@ -1,3 +1,6 @@
+import io
+from dataclasses import FrozenInstanceError, replace
+
 from shopping_list import ShoppingList, ShoppingListItem
 import pytest
 
@@ -47,3 +50,133 @@ def test_add_item():
     sl = ShoppingList()
     sl.add_item(ShoppingListItem("Butter", 2.5, 2))
     assert sl == ShoppingList([ShoppingListItem("Butter", 2.5, 2)])
+
+
+def test_add_item_merges_items_with_same_product_and_price(shopping_list):
+    shopping_list.add_item(ShoppingListItem("Tea", 2.5, 3))
+    shopping_list.add_item(ShoppingListItem("Tea", 3.5))
+
+    assert shopping_list.items == [
+        ShoppingListItem("Tea", 2.5, 4),
+        ShoppingListItem("Coffee", 7.0, 2),
+        ShoppingListItem("Tea", 3.5),
+    ]
+    assert shopping_list["Tea"] == [
+        ShoppingListItem("Tea", 2.5, 4),
+        ShoppingListItem("Tea", 3.5),
+    ]
+
+
+def test_add_item_to_list_with_duplicate_items():
+    sl = ShoppingList.from_item_values([("Tea", 2.5), ("Tea", 2.5)])
+    sl.add_item(ShoppingListItem("Tea", 2.5))
+
+    assert sl.items == [ShoppingListItem("Tea", 2.5, 2), ShoppingListItem("Tea", 2.5)]
+
+
+def test_returned_items_cannot_be_changed(shopping_list):
+    with pytest.raises(FrozenInstanceError):
+        shopping_list[0].price = 3.5
+    with pytest.raises(FrozenInstanceError):
+        shopping_list["Coffee"][0].amount = 5
+    with pytest.raises(AttributeError):
+        shopping_list.items.append(ShoppingListItem("Milk", 1.0))
+    with pytest.raises(TypeError):
+        shopping_list.items[0] = ShoppingListItem("Milk", 1.0)
+
+    assert shopping_list == ShoppingList.from_item_values(
+        [("Tea", 2.5), ("Coffee", 7.0, 2)]
+    )
+
+
+def test_items_is_a_view(shopping_list):
+    items = shopping_list.items
+    shopping_list.add_item(ShoppingListItem("Milk", 1.0))
+
+    assert len(items) == 3
+    assert items[-1] == ShoppingListItem("Milk", 1.0)
+    assert items == tuple(shopping_list)
+
+
+def test_add_item_merges_after_returned_items_were_replaced(shopping_list):
+    replace(shopping_list[0], price=3.5)
+    shopping_list.add_item(ShoppingListItem("Tea", 2.5))
+    shopping_list.add_item(ShoppingListItem("Tea", 3.5))
+
+    assert shopping_list.items == [
+        ShoppingListItem("Tea", 2.5, 2),
+        ShoppingListItem("Coffee", 7.0, 2),
+        ShoppingListItem("Tea", 3.5),
+    ]
+    assert shopping_list.find_by_product_name("Tea") == [
+        ShoppingListItem("Tea", 2.5, 2),
+        ShoppingListItem("Tea", 3.5),
+    ]
+
+
+def test_from_item_values_in_cents():
+    sl = ShoppingList.from_item_values(
+        [("Tea", 2.5), ("Coffee", 7.0, 2)], in_cents=True
+    )
+    assert sl.items == [
+        ShoppingListItem("Tea", 250),
+        ShoppingListItem("Coffee", 700, 2),
+    ]
+
+
+def test_str_in_cents():
+    sl = ShoppingList.from_item_values(
+        [("Tea", 2.5), ("Coffee", 7.0, 2)], in_cents=True
+    )
+    assert str(sl) == (
+        "Shopping List\n"
+        "  1 x Tea à 2.50 = 2.50\n"
+        "  2 x Coffee à 7.00 = 14.00\n"
+        "Total: 16.50"
+    )
+
+
+def test_total_price_in_cents_is_exact():
+    sl = ShoppingList(in_cents=True)
+    for _ in range(10_000):
+        sl.add_item(ShoppingListItem("Chewing Gum", 1))
+        sl.add_item(ShoppingListItem("Candy", 10, 2))
+    assert sl.total_price() == 210_000
+
+
+def test_total_price_in_cents_ignores_replaced_returned_items():
+    sl = ShoppingList.from_item_values([("Tea", 2.5)], in_cents=True)
+    replace(sl[0], amount=3)
+    replace(sl.find_by_product_name("Tea")[0], price=100)
+
+    assert sl.total_price() == 250
+    assert sl.total_price() == sum(item.total_price() for item in sl)
+
+
+def test_repr_shows_prices_in_cents():
+    sl = ShoppingList.from_item_values([("Tea", 2.5)], in_cents=True)
+
+    assert repr(sl).endswith(", in_cents=True)")
+    assert "in_cents" not in repr(ShoppingList.from_item_values([("Tea", 2.5)]))
+
+
+def test_add_item_with_float_price_in_cents_raises_error():
+    sl = ShoppingList(in_cents=True)
+    with pytest.raises(TypeError):
+        sl.add_item(ShoppingListItem("Tea", 2.5))
+    assert sl.items == []
+
+
+def test_iter_lines(shopping_list):
+    assert list(shopping_list.iter_lines()) == [
+        "Shopping List",
+        "  1 x Tea à 2.5 = 2.5",
+        "  2 x Coffee à 7.0 = 14.0",
+        "Total: 16.5",
+    ]
+
+
+def test_render(shopping_list):
+    stream = io.StringIO()
+    shopping_list.render(stream)
+    assert stream.getvalue() == str(shopping_list) + "\n"